@@ -0,0 +1,101 @@
+"""Vectorized spend analytics.
+
+Kept apart from analytics_repo so that NumPy is only imported on the first
+analytics request instead of when a worker boots.
+"""
+import numpy as np
+
+def _bucket(days, granularity):
+    """Map datetime64[D] days onto the start of their bucket, in the bucket's unit."""
+    if granularity == "month":
+        return days.astype("datetime64[M]")
+    if granularity == "week":
+        # 1970-01-01 was a Thursday, shift so that weeks start on Monday
+        return days - (days.astype("int64") + 3) % 7
+    return days
+
+def _axis(first, last, granularity):
+    """Return every bucket start from first to last inclusive."""
+    step = 7 if granularity == "week" else 1
+    return np.arange(first, last + step, step)
+
+def _rolling_mean(values, window):
+    """Trailing mean over window buckets, averaging fewer at the start of the series."""
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums / np.minimum(np.arange(1, len(values) + 1), window)
+
+def _dates(buckets):
+    return buckets.astype("datetime64[D]").tolist()
+
+def _category_trends(days, category_ids, totals, names):
+    """Compare each category's spend in the latest month against the month before."""
+    months = days.astype("datetime64[M]")
+    month_index = (months - months.min()).astype("int64")
+    categories, category_index = np.unique(category_ids, return_inverse=True)
+    matrix = np.zeros((len(categories), month_index.max() + 1))
+    np.add.at(matrix, (category_index, month_index), totals)
+
+    current = matrix[:, -1]
+    previous = matrix[:, -2] if matrix.shape[1] > 1 else np.zeros(len(categories))
+    delta = current - previous
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(previous != 0, delta / previous * 100, np.nan)
+
+    month = _dates(months.max())
+    return [
+        {
+            "category_id": category_id,
+            "name": names.get(category_id, "Unknown"),
+            "month": month,
+            "total": total,
+            "previous": prev,
+            "delta": diff,
+            "change_pct": None if np.isnan(pct) else pct,
+        }
+        for category_id, total, prev, diff, pct in zip(
+            categories.tolist(), current.tolist(), previous.tolist(), delta.tolist(), change.tolist()
+        )
+    ]
+
+def compute_analytics(rows, names, start=None, end=None, granularity="month", window=3, horizon=3):
+    """Bucket daily spend, smooth it and extrapolate it with a least squares line.
+
+    rows are (day, category_id, total) tuples, one per day and category,
+    loaded into parallel columnar arrays.
+    """
+    days = np.array([row[0] for row in rows], dtype="datetime64[D]")
+    category_ids = np.array([row[1] for row in rows], dtype="int64")
+    totals = np.array([row[2] for row in rows], dtype="float64")
+
+    result = {"granularity": granularity, "window": window, "buckets": [], "categories": [], "forecast": [], "slope": None}
+    if len(days) == 0 and not (start and end):
+        return result
+
+    buckets = _bucket(days, granularity)
+    first = _bucket(np.datetime64(start, "D"), granularity) if start else buckets.min()
+    last = _bucket(np.datetime64(end, "D"), granularity) if end else buckets.max()
+    axis = _axis(first, last, granularity)
+    index = np.searchsorted(axis, buckets)
+    series = np.bincount(index, weights=totals, minlength=len(axis))
+    rolling = _rolling_mean(series, window)
+    result["buckets"] = [
+        {"period": period, "total": total, "rolling_average": average}
+        for period, total, average in zip(_dates(axis), series.tolist(), rolling.tolist())
+    ]
+
+    if len(days):
+        result["categories"] = _category_trends(days, category_ids, totals, names)
+
+    if len(axis) >= 2 and horizon:
+        slope, intercept = np.polyfit(np.arange(len(axis)), series, 1)
+        future = np.arange(len(axis), len(axis) + horizon)
+        step = 7 if granularity == "week" else 1
+        periods = axis[-1] + step * np.arange(1, horizon + 1)
+        projected = np.maximum(slope * future + intercept, 0)
+        result["slope"] = float(slope)
+        result["forecast"] = [
+            {"period": period, "total": total}
+            for period, total in zip(_dates(periods), projected.tolist())
+        ]
+    return result
@@ -1,19 +1,38 @@
-from fastapi import Depends, HTTPException, status
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
-from app.core.database import get_db
+from app.core.database import get_db, read_session
 from app.models import User
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.cache import principal_cache
+from app.core.metrics import Histogram
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = 7 * 24 * 60
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+# Hashing gets its own small pool so login bursts cannot starve the shared threadpool
+hash_executor = ThreadPoolExecutor(max_workers=settings.HASH_WORKERS, thread_name_prefix="password-hash")
+hash_pending = 0
+HASH_LATENCY = Histogram("password_hash_seconds", "Time spent hashing or verifying a password")
+HASH_QUEUE_WAIT = Histogram("password_hash_queue_wait_seconds", "Time a hashing call waited for a free worker")
 
 def get_password_hash(password):
     """Hash a password for storing in the database."""
@@ -23,6 +42,40 @@ def verify_password(plain_password, hashed_password):
     """Verify a plain password against the hashed password."""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """Verify a password and return a new hash if the stored one uses outdated parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def run_hash(func, *args):
+    """Run a password hashing call on the dedicated hashing pool.
+
+    Rejects the call with 503 once HASH_WORKERS + HASH_QUEUE_DEPTH calls are
+    already running or queued.
+    """
+    global hash_pending
+    if hash_pending >= settings.HASH_WORKERS + settings.HASH_QUEUE_DEPTH:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    submitted = time.perf_counter()
+
+    def timed():
+        started = time.perf_counter()
+        HASH_QUEUE_WAIT.observe(started - submitted)
+        try:
+            return func(*args)
+        finally:
+            HASH_LATENCY.observe(time.perf_counter() - started)
+
+    hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, timed)
+    finally:
+        hash_pending -= 1
+
 def create_access_token(data: dict):
     """Create a JWT token for a user."""
     to_encode = data.copy()
@@ -30,7 +83,7 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     """Get the current user from the JWT token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,8 +97,34 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
+
+    user = principal_cache.get(username)
+    if user is not None:
+        return user
+
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
\ No newline at end of file
+    # Detach so the cached instance never touches a later request's session
+    db.expunge(user)
+    principal_cache.set(username, user)
+    return user
+
+async def get_read_db(
+    current_user: User = Depends(get_current_user),
+    x_min_data_version: Optional[int] = Header(None)
+):
+    """Session for read-only endpoints, on the read replica unless it may miss the user's last write."""
+    db = await read_session(current_user.id, x_min_data_version)
+    async with db:
+        yield db
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_principal(mapper, connection, target):
+    """Drop a changed or deleted user from the principal cache."""
+    principal_cache.delete(target.username)
+    # A renamed user is still cached under the old name
+    for old_username in inspect(target).attrs.username.history.deleted:
+        principal_cache.delete(old_username)
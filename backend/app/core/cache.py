@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import OrderedDict
+from app.core.config import settings
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire after ttl seconds.
+
+    maxsize bounds the number of entries, or their total weight when a
+    weigh(value) function is given, e.g. len for byte strings.
+
+    Any object with the same get/set/delete methods (e.g. a wrapper around
+    a shared store) can stand in for it so several workers share entries.
+    """
+
+    def __init__(self, maxsize, ttl, weigh=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigh = weigh
+        self.weight = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self.delete(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries when full.
+
+        A value heavier than maxsize on its own is not stored.
+        """
+        self.delete(key)
+        weight = self.weigh(value) if self.weigh else 1
+        if weight > self.maxsize:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value, weight)
+        self.weight += weight
+        while self.weight > self.maxsize:
+            _, (_, _, evicted) = self._data.popitem(last=False)
+            self.weight -= evicted
+
+    def delete(self, key):
+        """Drop key from the cache if present."""
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+
+    def clear(self):
+        """Drop every entry."""
+        self._data.clear()
+        self.weight = 0
+
+class SingleFlight:
+    """Let concurrent callers with the same key share one in-flight computation.
+
+    The first caller runs it, the others wait for its result (or exception).
+    Nothing is kept once it finishes; pair with a TTLCache to keep results.
+    """
+
+    def __init__(self):
+        self._flights = {}
+
+    async def do(self, key, fn):
+        """Return await fn(), or the result of an identical call that is already running."""
+        while (flight := self._flights.get(key)) is not None:
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                # The leading request went away, take over its work
+                if not flight.cancelled():
+                    raise
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            # Mark it retrieved, nobody may be waiting
+            flight.exception()
+            raise
+        finally:
+            del self._flights[key]
+        flight.set_result(result)
+        return result
+
+# Verified users keyed by token subject (username)
+principal_cache = TTLCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL)
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,6 +6,60 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
 
+    # Optional read replica for the list, report and analytics endpoints;
+    # any second database kept in sync with DATABASE_URL works, e.g. a
+    # streaming replica in production or a copied SQLite file locally
+    READ_DATABASE_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    # Users pinned to the primary at once, per process
+    PRIMARY_PIN_CACHE_SIZE: int = 10000
+    REPLICA_RETRY_SECONDS: float = 30.0
+
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 60
+
+    HASH_WORKERS: int = 2
+    HASH_QUEUE_DEPTH: int = 32
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    PDF_CACHE_SIZE: int = 256
+    PDF_CACHE_TTL: int = 3600
+    # Rendered reports are bounded by their total size per worker; reports
+    # above PDF_CACHE_MAX_REPORT_BYTES are only kept for background jobs
+    PDF_CACHE_BYTES: int = 64 * 1024 * 1024
+    PDF_CACHE_MAX_REPORT_BYTES: int = 4 * 1024 * 1024
+
+    ANALYTICS_CACHE_SIZE: int = 1024
+    ANALYTICS_CACHE_TTL: int = 3600
+
+    BATCH_MAX_OPERATIONS: int = 500
+    IDEMPOTENCY_KEY_TTL: int = 86400
+
+    SYNC_MAX_ROWS: int = 1000
+    SYNC_POLL_INTERVAL: float = 15.0
+
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    SLOW_QUERY_MS: int = 500
+
+    WARMUP_ON_STARTUP: bool = True
+
+    # Token buckets per user and route: burst requests at once, refilled at
+    # the per-minute rate
+    RATE_LIMIT_ENABLED: bool = True
+    # Buckets tracked per limiter; an evicted bucket starts full again, so
+    # keep this above the number of users active within a refill period
+    RATE_LIMIT_MAX_BUCKETS: int = 100000
+    RATE_LIMIT_PDF_PER_MINUTE: int = 10
+    RATE_LIMIT_PDF_BURST: int = 5
+    RATE_LIMIT_LIST_PER_MINUTE: int = 300
+    RATE_LIMIT_LIST_BURST: int = 60
+
     class Config:
         env_file = ".env"
 
@@ -1,16 +1,173 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import time
+from contextlib import AsyncExitStack, contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import Histogram
 
-engine = create_engine(settings.DATABASE_URL)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def async_database_url(url):
+    """Swap the driver of a database URL for its asyncio counterpart."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver:
+        url = url.set(drivername=driver)
+    return url
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each connection checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+POOL_CHECKOUT_WAIT = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection")
+
+def engine_options(url):
+    """Return pool and timeout options for an engine on url, based on Settings."""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection, there is no pool to size
+        return options
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS and url.get_backend_name() == "postgresql":
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    return options
+
+database_url = async_database_url(settings.DATABASE_URL)
+engine = create_async_engine(database_url, **engine_options(database_url))
+
+@event.listens_for(engine.sync_engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite only enforces foreign keys, and so ON DELETE CASCADE, when asked per connection."""
+    if engine.dialect.name == "sqlite":
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+# expire_on_commit=False keeps loaded attributes usable after commit, since
+# an AsyncSession cannot lazily reload them
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+read_engine = None
+ReadSessionLocal = SessionLocal
+if settings.READ_DATABASE_URL:
+    read_database_url = async_database_url(settings.READ_DATABASE_URL)
+    read_engine = create_async_engine(read_database_url, **engine_options(read_database_url))
+    ReadSessionLocal = async_sessionmaker(bind=read_engine, autoflush=False, expire_on_commit=False)
+
+# Users who wrote in the last READ_YOUR_WRITES_SECONDS read from the primary,
+# so a replica that lags behind never hides their own writes from them.
+# Pins only cover the process that served the write; for the other workers
+# the client echoes the X-Data-Version of its last write back as
+# X-Min-Data-Version, and reads go to the primary until the replica has it
+primary_pins = TTLCache(settings.PRIMARY_PIN_CACHE_SIZE, settings.READ_YOUR_WRITES_SECONDS)
+replica_down_until = 0.0
+
+# The data version written by the current request, set per request by
+# send_written_version
+written_version = ContextVar("written_version", default=None)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def prefill_pool():
+    """Open pool_size connections up front so the first requests skip the connect handshake."""
+    size = engine.pool.size() if isinstance(engine.pool, TimedQueuePool) else 1
+    async with AsyncExitStack() as stack:
+        for _ in range(size):
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.execute(text("SELECT 1"))
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
+
+def pin_to_primary(user_id, version):
+    """Send the user's reads to the primary for the next READ_YOUR_WRITES_SECONDS.
+
+    version is the data version the user just wrote, reported to the client
+    as X-Data-Version.
+    """
+    primary_pins.set(user_id, True)
+    written = written_version.get()
+    if written is not None:
+        written["version"] = version
+
+async def send_written_version(request, call_next):
+    """Middleware adding X-Data-Version to the responses of successful writes."""
+    written = {}
+    written_version.set(written)
+    response = await call_next(request)
+    if "version" in written and response.status_code < 400:
+        response.headers["X-Data-Version"] = str(written["version"])
+    return response
+
+async def read_session(user_id=None, min_version=None):
+    """Open a session for read-only work, on the replica when it can serve user_id.
+
+    Falls back to the primary when no replica is configured, the user wrote
+    recently, the replica has not caught up with min_version of the user's
+    data yet, or the replica could not be reached in the last
+    REPLICA_RETRY_SECONDS.
+    """
+    global replica_down_until
+    if read_engine is None or primary_pins.get(user_id) or time.monotonic() < replica_down_until:
+        return SessionLocal()
+    db = ReadSessionLocal()
+    try:
+        await db.connection()
+        if min_version:
+            result = await db.execute(text("SELECT version FROM data_versions WHERE user_id = :user_id"), {"user_id": user_id})
+            if (result.scalar() or 0) < min_version:
+                await db.close()
+                return SessionLocal()
+    except (DBAPIError, OSError):
+        await db.close()
+        replica_down_until = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+        return SessionLocal()
+    return db
+
+def dialect_insert(db):
+    """Return the dialect specific INSERT construct that supports ON CONFLICT."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+@contextmanager
+def count_statements(bind=engine.sync_engine):
+    """Count the SQL statements executed on bind inside the with block.
+
+    Yields a list that receives every statement, so callers can assert on
+    len() to catch N+1 query regressions.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
     finally:
-        db.close()
\ No newline at end of file
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
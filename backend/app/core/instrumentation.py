@@ -0,0 +1,63 @@
+import logging
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.database import engine, read_engine
+from app.core.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route", ("method", "route", "status"))
+SQL_STATEMENTS = Counter("db_statements_total", "SQL statements executed by route", ("method", "route"))
+SQL_TIME = Histogram("db_statement_duration_seconds", "SQL time spent per request by route", ("method", "route"))
+
+def _pool_stat(pool_engine, name):
+    """Read a QueuePool statistic, 0 for pools that do not keep it."""
+    stat = getattr(pool_engine.pool, name, None)
+    return max(stat(), 0) if stat else 0
+
+Gauge("db_pool_checked_out", "Connections currently checked out of the pool", lambda: _pool_stat(engine, "checkedout"))
+Gauge("db_pool_overflow", "Connections open beyond the pool size", lambda: _pool_stat(engine, "overflow"))
+if read_engine is not None:
+    Gauge("db_replica_pool_checked_out", "Connections currently checked out of the read replica pool", lambda: _pool_stat(read_engine, "checkedout"))
+    Gauge("db_replica_pool_overflow", "Connections open beyond the read replica pool size", lambda: _pool_stat(read_engine, "overflow"))
+
+# SQL statistics of the request being handled, set by record_request_metrics
+request_sql = ContextVar("request_sql", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    stats = request_sql.get()
+    if stats is not None:
+        stats["count"] += 1
+        stats["seconds"] += elapsed
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning("Slow query (%.0f ms): %s", elapsed * 1000, statement)
+
+# Reads routed to the replica count towards the same request statistics
+for instrumented in (engine, read_engine):
+    if instrumented is not None:
+        event.listen(instrumented.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(instrumented.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+async def record_request_metrics(request, call_next):
+    """Record latency and SQL statistics of every request, labelled by route template."""
+    stats = {"count": 0, "seconds": 0.0}
+    token = request_sql.set(stats)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        request_sql.reset(token)
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, path, str(status))
+        SQL_STATEMENTS.inc(stats["count"], request.method, path)
+        SQL_TIME.observe(stats["seconds"], request.method, path)
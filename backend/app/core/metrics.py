@@ -0,0 +1,100 @@
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _labels(labelnames, labelvalues, extra=""):
+    """Format a Prometheus label set, e.g. {method="GET",le="0.5"}."""
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """Cumulative Prometheus style histogram, safe to observe from worker threads."""
+
+    def __init__(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        if not labelnames:
+            self._series[()] = self._new_series()
+        registry.append(self)
+
+    def _new_series(self):
+        return {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+
+    def observe(self, value, *labelvalues):
+        """Record a single observation for the given label values."""
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = self._new_series()
+            series["sum"] += value
+            series["count"] += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+
+    def render(self):
+        """Return the histogram in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labelvalues, series in self._series.items():
+                for bound, count in zip(self.buckets, series["counts"]):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {count}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {series['count']}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {series['sum']}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {series['count']}")
+        return "\n".join(lines)
+
+class Counter:
+    """Monotonic Prometheus style counter."""
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def inc(self, amount=1, *labelvalues):
+        """Add amount to the counter for the given label values."""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        """Return the counter in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in self._values.items():
+                lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {value}")
+        return "\n".join(lines)
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name, description, callback):
+        self.name = name
+        self.description = description
+        self.callback = callback
+        registry.append(self)
+
+    def render(self):
+        """Return the gauge in the Prometheus text exposition format."""
+        return "\n".join([
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.callback()}",
+        ])
+
+registry = []
+
+def render_metrics():
+    """Render every registered metric as one Prometheus text document."""
+    return "\n".join(metric.render() for metric in registry) + "\n"
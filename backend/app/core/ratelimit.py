@@ -0,0 +1,46 @@
+import math
+import time
+from fastapi import Depends, HTTPException, Request
+from app.core.auth import get_current_user
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import User
+
+class RateLimiter:
+    """Token bucket per user and route, used as a route dependency.
+
+    Each bucket holds up to burst tokens and refills at per_minute tokens a
+    minute; a request takes one token or is refused with a 429 whose
+    Retry-After says when the next token arrives. Buckets live in a
+    TTLCache that forgets them once they would be full again, so idle users
+    cost nothing. Limits apply per worker process.
+    """
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self._buckets = TTLCache(settings.RATE_LIMIT_MAX_BUCKETS, burst / self.rate if self.rate else 0)
+
+    def acquire(self, key):
+        """Take a token from key's bucket; return 0, or the seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key) or (self.burst, now)
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            return (1 - tokens) / self.rate
+        self._buckets.set(key, (tokens - 1, now))
+        return 0
+
+    async def __call__(self, request: Request, current_user: User = Depends(get_current_user)):
+        if not settings.RATE_LIMIT_ENABLED or self.rate <= 0:
+            return
+        wait = self.acquire((current_user.id, request.scope["route"].path))
+        if wait:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+pdf_rate_limit = RateLimiter(settings.RATE_LIMIT_PDF_PER_MINUTE, settings.RATE_LIMIT_PDF_BURST)
+list_rate_limit = RateLimiter(settings.RATE_LIMIT_LIST_PER_MINUTE, settings.RATE_LIMIT_LIST_BURST)
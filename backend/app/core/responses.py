@@ -0,0 +1,12 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, for large lists of plain dicts.
+
+    List routes return it directly so FastAPI skips re-validating the rows
+    against the response_model, which then only documents the shape.
+    """
+
+    def render(self, content):
+        return orjson.dumps(content)
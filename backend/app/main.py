@@ -1,11 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import engine, Base
-from .routes import user, category, expense, pdf
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.database import engine, read_engine, prefill_pool, send_written_version
+from app.core.metrics import render_metrics
+from app.core.instrumentation import record_request_metrics
+from app.repository.pdf_repo import report_styles
+from .routes import user, category, expense, budget, pdf, sync
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app):
+    # The schema is managed by `alembic upgrade head`, run once per deploy
+    # before the workers start, so booting a worker does no DDL
+    if settings.WARMUP_ON_STARTUP:
+        await prefill_pool()
+        # Importing reportlab and building the styles takes a while, do it
+        # in the background instead of delaying the first request
+        asyncio.get_running_loop().run_in_executor(None, report_styles)
+    yield
+    await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
 
-app = FastAPI(title="Expense Tracker API")
+app = FastAPI(title="Expense Tracker API", lifespan=lifespan)
+
+app.middleware("http")(record_request_metrics)
+app.middleware("http")(send_written_version)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,13 +35,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed", "X-Budget-Alert", "Retry-After", "X-Data-Version"],
 )
 
 @app.get('/')
 def root():
     return {'message': 'Expense Tracker API 🚀'}
 
+@app.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return render_metrics()
+
 app.include_router(user.router)
 app.include_router(category.router)
 app.include_router(expense.router)
-app.include_router(pdf.router)
\ No newline at end of file
+app.include_router(budget.router)
+app.include_router(pdf.router)
+app.include_router(sync.router)
\ No newline at end of file
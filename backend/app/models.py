@@ -1,5 +1,5 @@
 from app.core.database import Base
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -11,18 +11,27 @@ class User(Base):
     email = Column(String(50), unique=True, index=True)
     password = Column(String(255))
     
-    categories = relationship('Category', back_populates='owner', cascade="all, delete-orphan")
-    expenses = relationship('Expense', back_populates='owner', cascade="all, delete-orphan")
+    # passive_deletes leaves removing the children to ON DELETE CASCADE instead
+    # of loading them and deleting them one row at a time
+    categories = relationship('Category', back_populates='owner', cascade="all, delete-orphan", passive_deletes=True)
+    expenses = relationship('Expense', back_populates='owner', cascade="all, delete-orphan", passive_deletes=True)
 
 class Category(Base):
     __tablename__ = 'categories'
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50))
-    user_id = Column(Integer, ForeignKey('users.id'))
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'))
+    # Data version of the write that last touched the row, see sync_repo
+    version = Column(Integer, nullable=False, default=0, server_default='0')
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     owner = relationship('User', back_populates='categories')
-    expenses = relationship('Expense', back_populates='category', cascade="all, delete-orphan")
+    expenses = relationship('Expense', back_populates='category', cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index('ix_categories_user_version', 'user_id', 'version'),
+    )
 
 class Expense(Base):
     __tablename__ = 'expenses'
@@ -33,8 +42,102 @@ class Expense(Base):
     date = Column(DateTime, default=datetime.utcnow)
     type = Column(String(20))  # expense or income
 
-    user_id = Column(Integer, ForeignKey('users.id'))
-    category_id = Column(Integer, ForeignKey('categories.id'))
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'))
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'))
+    # Data version of the write that last touched the row, see sync_repo
+    version = Column(Integer, nullable=False, default=0, server_default='0')
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     owner = relationship('User', back_populates='expenses')
-    category = relationship('Category', back_populates='expenses')
\ No newline at end of file
+    category = relationship('Category', back_populates='expenses')
+
+    __table_args__ = (
+        # Serves the keyset-paginated listing: WHERE user_id = ? ORDER BY date DESC, id DESC
+        Index('ix_expenses_user_date_id', 'user_id', 'date', 'id'),
+        # Serves the sync feed: WHERE user_id = ? AND version > ?
+        Index('ix_expenses_user_version', 'user_id', 'version'),
+    )
+
+class ExpenseRollup(Base):
+    __tablename__ = 'expense_rollups'
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), nullable=False)
+    type = Column(String(20), nullable=False)
+    day = Column(Date, nullable=False)
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # One running total per user, category, type and day; also the upsert conflict target
+        UniqueConstraint('user_id', 'day', 'category_id', 'type', name='uq_expense_rollups_bucket'),
+    )
+
+
+class CategoryMonthTotal(Base):
+    __tablename__ = 'category_month_totals'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), nullable=False)
+    month = Column(Date, nullable=False)  # first day of the month
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Running spend (type expense only) per category and month, adjusted
+        # by every write so a budget check reads a single row
+        UniqueConstraint('user_id', 'category_id', 'month', name='uq_category_month_totals_bucket'),
+    )
+
+
+class Budget(Base):
+    __tablename__ = 'budgets'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), nullable=False)
+    amount = Column(Float, nullable=False)  # monthly limit
+    alert_threshold = Column(Float, nullable=False, default=0.8)  # share of amount that triggers a warning
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'category_id', name='uq_budgets_user_category'),
+    )
+
+
+class DataVersion(Base):
+    __tablename__ = 'data_versions'
+
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class SyncTombstone(Base):
+    __tablename__ = 'sync_tombstones'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    entity = Column(String(20), nullable=False)  # expense or category
+    entity_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_sync_tombstones_user_version', 'user_id', 'version'),
+    )
+
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    key = Column(String(100), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    response = Column(Text)  # NULL while the request is still being applied
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+    )
@@ -0,0 +1,37 @@
+from sqlalchemy import select
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import Category, ExpenseRollup
+from app.repository.version_repo import get_data_version
+
+# Keyed by (user, data version, parameters), like the PDF report cache
+analytics_cache = TTLCache(settings.ANALYTICS_CACHE_SIZE, settings.ANALYTICS_CACHE_TTL)
+
+async def get_user_analytics(current_user, db, start=None, end=None, granularity="month", window=3, horizon=3):
+    """Return spend trends, category deltas and a forecast, memoized per data version."""
+    version = await get_data_version(current_user.id, db)
+    key = (current_user.id, version, start, end, granularity, window, horizon)
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # The daily rollups already hold one row per day and category, which is
+    # all the resolution the buckets need
+    query = select(ExpenseRollup.day, ExpenseRollup.category_id, ExpenseRollup.total).where(
+        ExpenseRollup.user_id == current_user.id,
+        ExpenseRollup.type == "expense",
+        ExpenseRollup.count > 0
+    )
+    if start:
+        query = query.where(ExpenseRollup.day >= start)
+    if end:
+        query = query.where(ExpenseRollup.day <= end)
+    rows = (await db.execute(query)).all()
+
+    name_rows = await db.execute(select(Category.id, Category.name).where(Category.user_id == current_user.id))
+    names = dict(name_rows.all())
+
+    from app.core.analytics import compute_analytics
+    result = compute_analytics(rows, names, start, end, granularity, window, horizon)
+    analytics_cache.set(key, result)
+    return result
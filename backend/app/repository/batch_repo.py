@@ -0,0 +1,159 @@
+import hashlib
+from datetime import datetime, time, timedelta
+from types import SimpleNamespace
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
+from app.models import Category, Expense, IdempotencyKey
+from app.repository.expense_repo import expense_row
+from app.repository.summary_repo import apply_rollup_rows
+from app.repository.version_repo import add_tombstones, bump_data_version
+
+ROLLUP_COLUMNS = (Expense.category_id, Expense.type, Expense.date, Expense.amount)
+
+def _values(expense, current_user, version):
+    return {
+        "amount": expense.amount,
+        "description": expense.description,
+        "date": datetime.combine(expense.date, time.min),
+        "type": expense.type,
+        "category_id": expense.category_id,
+        "user_id": current_user.id,
+        "version": version
+    }
+
+def _rollup_row(values):
+    return (values["category_id"], values["type"], values["date"], values["amount"])
+
+def _replay(stored, request_hash):
+    """Return the stored response of an idempotency key, or fail if it cannot be replayed."""
+    if stored.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency key was already used for a different request")
+    if stored.response is None:
+        raise HTTPException(status_code=409, detail="A request with this idempotency key is still in progress")
+    return ORJSONResponse(orjson.loads(stored.response), headers={"Idempotent-Replayed": "true"})
+
+async def _claim_key(key, request_hash, current_user, db):
+    """Reserve an idempotency key inside the batch transaction, or return the response to replay."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    await db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.user_id == current_user.id,
+        IdempotencyKey.created_at < cutoff
+    ))
+    lookup = select(IdempotencyKey).where(IdempotencyKey.user_id == current_user.id, IdempotencyKey.key == key)
+    stored = (await db.execute(lookup)).scalar_one_or_none()
+    if stored:
+        return _replay(stored, request_hash)
+
+    try:
+        # The unique constraint makes a concurrent retry wait for, then
+        # conflict with, this transaction instead of applying the batch twice
+        await db.execute(insert(IdempotencyKey).values(
+            user_id=current_user.id, key=key, request_hash=request_hash, created_at=datetime.utcnow()
+        ))
+    except IntegrityError:
+        await db.rollback()
+        stored = (await db.execute(lookup)).scalar_one_or_none()
+        if stored is None:
+            raise HTTPException(status_code=409, detail="A request with this idempotency key is still in progress")
+        return _replay(stored, request_hash)
+    return None
+
+async def apply_expense_batch(batch, current_user, db, idempotency_key=None):
+    """Apply a mixed list of create, update and delete operations in one transaction.
+
+    Each kind of operation runs as a single bulk statement. Results come
+    back in request order. With an idempotency key, the response is stored
+    in the same transaction, so a retry gets the same response without the
+    batch being applied again.
+    """
+    operations = batch.operations
+    if len(operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_OPERATIONS} operations per batch")
+    ids = [operation.id for operation in operations if operation.id is not None]
+    if len(ids) != len(set(ids)):
+        raise HTTPException(status_code=400, detail="An expense can only appear in one operation per batch")
+
+    request_hash = hashlib.sha256(batch.model_dump_json().encode()).hexdigest()
+    if idempotency_key:
+        replay = await _claim_key(idempotency_key, request_hash, current_user, db)
+        if replay is not None:
+            return replay
+
+    # Every category written to must belong to the user
+    category_ids = {operation.expense.category_id for operation in operations if operation.expense}
+    names = {}
+    if category_ids:
+        result = await db.execute(select(Category.id, Category.name).where(
+            Category.id.in_(category_ids), Category.user_id == current_user.id
+        ))
+        names = dict(result.all())
+        if len(names) != len(category_ids):
+            raise HTTPException(status_code=404, detail="Category not found")
+
+    creates = [(index, operation) for index, operation in enumerate(operations) if operation.op == "create"]
+    updates = {operation.id: (index, operation) for index, operation in enumerate(operations) if operation.op == "update"}
+    delete_ids = [operation.id for operation in operations if operation.op == "delete"]
+    # Written rows keyed by the index of their operation in the batch
+    written = {}
+    version = await bump_data_version(current_user.id, db)
+
+    if delete_ids:
+        result = await db.execute(
+            delete(Expense).where(Expense.id.in_(delete_ids), Expense.user_id == current_user.id)
+            .returning(*ROLLUP_COLUMNS, Expense.id),
+            execution_options={"synchronize_session": False}
+        )
+        removed = result.all()
+        if len(removed) != len(delete_ids):
+            raise HTTPException(status_code=404, detail="Expense not found")
+        await apply_rollup_rows((row[:4] for row in removed), current_user.id, db, sign=-1)
+        await add_tombstones("expense", [row.id for row in removed], current_user.id, version, db)
+
+    if updates:
+        # The old values are needed to take them back out of the rollups
+        result = await db.execute(
+            select(*ROLLUP_COLUMNS).where(Expense.id.in_(updates), Expense.user_id == current_user.id)
+            .with_for_update()
+        )
+        previous = result.all()
+        if len(previous) != len(updates):
+            raise HTTPException(status_code=404, detail="Expense not found")
+        await apply_rollup_rows(previous, current_user.id, db, sign=-1)
+        # Bulk updates by primary key skip onupdate defaults, so stamp updated_at here
+        now = datetime.utcnow()
+        rows = {
+            index: {"id": expense_id, "updated_at": now, **_values(operation.expense, current_user, version)}
+            for expense_id, (index, operation) in updates.items()
+        }
+        await db.execute(update(Expense), list(rows.values()))
+        await apply_rollup_rows(map(_rollup_row, rows.values()), current_user.id, db)
+        written.update(rows)
+
+    if creates:
+        rows = {index: _values(operation.expense, current_user, version) for index, operation in creates}
+        result = await db.execute(insert(Expense).returning(Expense.id, sort_by_parameter_order=True), list(rows.values()))
+        for row, expense_id in zip(rows.values(), result.scalars()):
+            row["id"] = expense_id
+        await apply_rollup_rows(map(_rollup_row, rows.values()), current_user.id, db)
+        written.update(rows)
+
+    results = []
+    for index, operation in enumerate(operations):
+        if operation.op == "delete":
+            results.append({"op": "delete", "id": operation.id, "expense": None})
+            continue
+        row = written[index]
+        expense = expense_row(SimpleNamespace(category_name=names[row["category_id"]], **row))
+        results.append({"op": operation.op, "id": row["id"], "expense": expense})
+    response = {"results": results}
+
+    if idempotency_key:
+        await db.execute(update(IdempotencyKey).where(
+            IdempotencyKey.user_id == current_user.id, IdempotencyKey.key == idempotency_key
+        ).values(response=orjson.dumps(response).decode()))
+    await db.commit()
+    return ORJSONResponse(response)
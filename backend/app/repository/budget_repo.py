@@ -0,0 +1,119 @@
+from datetime import date
+from fastapi import HTTPException
+from sqlalchemy import and_, func, select
+from app.models import Budget, Category, CategoryMonthTotal
+from app.repository.version_repo import bump_data_version
+
+def budget_state(spent, amount, alert_threshold):
+    """Classify a month's spend against a budget as ok, warning or over."""
+    if spent > amount:
+        return "over"
+    if spent >= amount * alert_threshold:
+        return "warning"
+    return "ok"
+
+async def _get_budget(budget_id, current_user, db):
+    result = await db.execute(select(Budget).where(Budget.id == budget_id, Budget.user_id == current_user.id))
+    budget = result.scalar_one_or_none()
+    if not budget:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    return budget
+
+async def create_user_budget(budget, current_user, db):
+    """Create a monthly budget for one of the current user's categories."""
+    result = await db.execute(select(Category.id).where(Category.id == budget.category_id, Category.user_id == current_user.id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    result = await db.execute(select(Budget.id).where(Budget.category_id == budget.category_id, Budget.user_id == current_user.id))
+    if result.scalar_one_or_none() is not None:
+        raise HTTPException(status_code=400, detail="Category already has a budget")
+    new_budget = Budget(
+        user_id=current_user.id,
+        category_id=budget.category_id,
+        amount=budget.amount,
+        alert_threshold=budget.alert_threshold
+    )
+    db.add(new_budget)
+    await bump_data_version(current_user.id, db)
+    await db.commit()
+    await db.refresh(new_budget)
+    return new_budget
+
+async def get_user_budgets(current_user, db):
+    """Retrieve all budgets for the current user."""
+    result = await db.execute(select(Budget).where(Budget.user_id == current_user.id).order_by(Budget.id))
+    return result.scalars().all()
+
+async def update_user_budget(budget_id, budget, current_user, db):
+    """Change the amount or alert threshold of a budget."""
+    db_budget = await _get_budget(budget_id, current_user, db)
+    db_budget.amount = budget.amount
+    db_budget.alert_threshold = budget.alert_threshold
+    await bump_data_version(current_user.id, db)
+    await db.commit()
+    await db.refresh(db_budget)
+    return db_budget
+
+async def delete_user_budget(budget_id, current_user, db):
+    """Delete a budget for the current user."""
+    budget = await _get_budget(budget_id, current_user, db)
+    await db.delete(budget)
+    await bump_data_version(current_user.id, db)
+    await db.commit()
+    return {"message": "Deleted budget"}
+
+async def get_user_budget_status(current_user, db, month=None):
+    """Return every budget of the current user with its spend for a month, in one query.
+
+    The spend comes from the running month totals, so the cost does not
+    depend on how many expenses the month holds.
+    """
+    month = (month or date.today()).replace(day=1)
+    spent = func.coalesce(CategoryMonthTotal.total, 0)
+    result = await db.execute(select(
+        Budget.id,
+        Budget.category_id,
+        Category.name,
+        Budget.amount,
+        Budget.alert_threshold,
+        spent.label("spent")
+    ).join(Category, Category.id == Budget.category_id).outerjoin(CategoryMonthTotal, and_(
+        CategoryMonthTotal.user_id == Budget.user_id,
+        CategoryMonthTotal.category_id == Budget.category_id,
+        CategoryMonthTotal.month == month
+    )).where(Budget.user_id == current_user.id).order_by(Category.name))
+    return [
+        {
+            "budget_id": row.id,
+            "category_id": row.category_id,
+            "name": row.name,
+            "month": month,
+            "amount": row.amount,
+            "spent": row.spent,
+            "remaining": row.amount - row.spent,
+            "status": budget_state(row.spent, row.amount, row.alert_threshold)
+        }
+        for row in result
+    ]
+
+async def budget_alert(user_id, category_id, day, db):
+    """Return "warning" or "over" if a category's budget is crossed in the month of day, else None.
+
+    A single-row lookup against the running month total, cheap enough to
+    run inside every expense write.
+    """
+    result = await db.execute(select(
+        Budget.amount,
+        Budget.alert_threshold,
+        func.coalesce(CategoryMonthTotal.total, 0)
+    ).outerjoin(CategoryMonthTotal, and_(
+        CategoryMonthTotal.user_id == Budget.user_id,
+        CategoryMonthTotal.category_id == Budget.category_id,
+        CategoryMonthTotal.month == day.replace(day=1)
+    )).where(Budget.user_id == user_id, Budget.category_id == category_id))
+    row = result.first()
+    if row is None:
+        return None
+    amount, alert_threshold, spent = row
+    state = budget_state(spent, amount, alert_threshold)
+    return None if state == "ok" else state
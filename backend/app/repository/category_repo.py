@@ -1,23 +1,37 @@
 from fastapi import HTTPException
-from app.models import Category
+from sqlalchemy import delete, select
+from app.models import Budget, Category, CategoryMonthTotal, Expense, ExpenseRollup
+from app.repository.version_repo import add_expense_tombstones_for_category, add_tombstones, bump_data_version
 
-def create_user_category(category, current_user, db):
+async def create_user_category(category, current_user, db):
     """Create a new category for the current user."""
-    new_category = Category(name=category.name, user_id=current_user.id)
+    version = await bump_data_version(current_user.id, db)
+    new_category = Category(name=category.name, user_id=current_user.id, version=version)
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    await db.refresh(new_category)
     return new_category
 
-def get_user_category(current_user, db):
-    """Retrieve all categories for the current user."""
-    return db.query(Category).filter(Category.user_id == current_user.id).all()
+async def get_user_category(current_user, db):
+    """Retrieve all categories for the current user as CategoryResponse shaped dicts."""
+    result = await db.execute(select(Category.id, Category.name).where(Category.user_id == current_user.id))
+    return [{"id": row.id, "name": row.name} for row in result]
 
-def delete_user_category(category_id, current_user, db):
+async def delete_user_category(category_id, current_user, db):
     """Delete a category by ID for the current user."""
-    category = db.query(Category).filter(Category.id == category_id, Category.user_id == current_user.id).first()
+    result = await db.execute(select(Category).where(Category.id == category_id, Category.user_id == current_user.id))
+    category = result.scalar_one_or_none()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    db.delete(category)
-    db.commit()
-    return {"message": f"Deleted {category.name} category"}
\ No newline at end of file
+    version = await bump_data_version(current_user.id, db)
+    await add_expense_tombstones_for_category(category.id, current_user.id, version, db)
+    await add_tombstones("category", [category.id], current_user.id, version, db)
+    # Set-based deletes instead of db.delete(category), which would load and
+    # delete every expense of the category one by one
+    await db.execute(delete(ExpenseRollup).where(ExpenseRollup.category_id == category.id))
+    await db.execute(delete(CategoryMonthTotal).where(CategoryMonthTotal.category_id == category.id))
+    await db.execute(delete(Budget).where(Budget.category_id == category.id))
+    await db.execute(delete(Expense).where(Expense.category_id == category.id))
+    await db.execute(delete(Category).where(Category.id == category.id))
+    await db.commit()
+    return {"message": f"Deleted {category.name} category"}
@@ -1,48 +1,339 @@
+import base64
+import codecs
+import csv
+import io
+import json
+from itertools import islice
 from fastapi import HTTPException
-from app.models import Expense
-from datetime import datetime
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import and_, delete, insert, or_, select
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import joinedload
+from app.models import Category, Expense
+from app.core.cache import SingleFlight
+from app.core.database import read_session
+from app.schema import ExpenseCreate
+from app.repository.summary_repo import add_to_rollup, remove_from_rollup, apply_rollup_rows
+from app.repository.version_repo import add_tombstones, bump_data_version
+from app.repository.budget_repo import budget_alert
+from datetime import datetime, time, timedelta
 
-def create_user_expense(expense, current_user, db):
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_COLUMNS = ["id", "amount", "description", "date", "type", "category_id", "category"]
+
+# Identical listings requested at the same time (several tabs loading the
+# dashboard) run one query
+listing_flights = SingleFlight()
+
+async def flag_budget_alert(expense, db, response):
+    """Set X-Budget-Alert on response when an expense pushes its category past its budget."""
+    if response is None or expense.type != "expense":
+        return
+    alert = await budget_alert(expense.user_id, expense.category_id, expense.date.date(), db)
+    if alert:
+        response.headers["X-Budget-Alert"] = alert
+
+async def create_user_expense(expense, current_user, db, response=None):
     """Create a new expense for the current user."""
+    version = await bump_data_version(current_user.id, db)
     new_expense = Expense(
         amount=expense.amount,
         description=expense.description,
-        date=expense.date or datetime.utcnow(),
+        date=datetime.combine(expense.date, time.min) if expense.date else datetime.utcnow(),
         type=expense.type,
         category_id=expense.category_id,
-        user_id=current_user.id
+        user_id=current_user.id,
+        version=version
     )
     db.add(new_expense)
-    db.commit()
-    db.refresh(new_expense)
+    await add_to_rollup(new_expense, db)
+    await flag_budget_alert(new_expense, db, response)
+    await db.commit()
+    await db.refresh(new_expense, ["category"])
     return new_expense
 
-def get_user_expense(current_user, db):
-    """Retrieve all expenses for the current user."""
-    return db.query(Expense).filter(Expense.user_id == current_user.id).order_by(Expense.date.desc()).all()
+def encode_cursor(expense):
+    """Encode the (date, id) position of an expense as an opaque cursor."""
+    raw = f"{expense.date.isoformat()}|{expense.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor back into (date, id)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_part, id_part = raw.split("|")
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def filter_user_expense(query, current_user, start=None, end=None, category_id=None, type=None):
+    """Apply the user, date range, category and type filters to an expense query."""
+    query = query.filter(Expense.user_id == current_user.id)
+    if start:
+        query = query.filter(Expense.date >= datetime.combine(start, time.min))
+    if end:
+        query = query.filter(Expense.date < datetime.combine(end + timedelta(days=1), time.min))
+    if category_id is not None:
+        query = query.filter(Expense.category_id == category_id)
+    if type:
+        query = query.filter(Expense.type == type)
+    return query
+
+def expense_row(row):
+    """Convert an (expense columns, category name) row into an ExpenseResponse shaped dict."""
+    return {
+        "id": row.id,
+        "amount": row.amount,
+        "description": row.description,
+        "date": row.date.date(),
+        "type": row.type,
+        "category_id": row.category_id,
+        "category": {"id": row.category_id, "name": row.category_name},
+    }
+
+async def get_user_expense(current_user, db, limit=None, cursor=None, start=None, end=None, category_id=None, type=None, key=None):
+    """Retrieve a page of expenses for the current user, newest first.
 
-def update_user_expense(expense_id, expense, current_user, db):
+    Returns the expenses as ExpenseResponse shaped dicts, built straight
+    from row tuples without hydrating ORM objects, together with the cursor
+    of the next page, or None when there are no more rows. Concurrent calls
+    with the same key, which must pin the user, data version and filters
+    (e.g. the listing's ETag), share one query.
+    """
+    if key is not None:
+        return await listing_flights.do(key, lambda: get_user_expense(current_user, db, limit, cursor, start, end, category_id, type))
+    query = select(
+        Expense.id,
+        Expense.amount,
+        Expense.description,
+        Expense.date,
+        Expense.type,
+        Expense.category_id,
+        Category.name.label("category_name")
+    ).join(Category, Category.id == Expense.category_id)
+    query = filter_user_expense(query, current_user, start, end, category_id, type)
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Expense.date < cursor_date,
+            and_(Expense.date == cursor_date, Expense.id < cursor_id)
+        ))
+    query = query.order_by(Expense.date.desc(), Expense.id.desc())
+    if limit is None:
+        result = await db.execute(query)
+        return [expense_row(row) for row in result], None
+
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return [expense_row(row) for row in rows], encode_cursor(rows[-1])
+    return [expense_row(row) for row in rows], None
+
+async def update_user_expense(expense_id, expense, current_user, db, response=None):
     """Update an existing expense for the current user."""
-    db_expense = db.query(Expense).filter(Expense.id == expense_id, Expense.user_id == current_user.id).first()
+    result = await db.execute(select(Expense).where(Expense.id == expense_id, Expense.user_id == current_user.id))
+    db_expense = result.scalar_one_or_none()
     if not db_expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
+    version = await bump_data_version(current_user.id, db)
+    await remove_from_rollup(db_expense, db)
+    db_expense.version = version
     db_expense.amount = expense.amount
     db_expense.description = expense.description
-    db_expense.date = expense.date or db_expense.date
+    db_expense.date = datetime.combine(expense.date, time.min) if expense.date else db_expense.date
     db_expense.type = expense.type
     db_expense.category_id = expense.category_id
-    db.commit()
-    db.refresh(db_expense)
+    await add_to_rollup(db_expense, db)
+    await flag_budget_alert(db_expense, db, response)
+    await db.commit()
+    await db.refresh(db_expense, ["category"])
     return db_expense
 
-def delete_user_expense(expense_id, current_user, db):
+async def delete_user_expense(expense_id, current_user, db):
     """Delete an expense for the current user."""
-    expense = db.query(Expense).filter(Expense.id == expense_id, Expense.user_id == current_user.id).first()
+    result = await db.execute(select(Expense).options(joinedload(Expense.category)).where(
+        Expense.id == expense_id, Expense.user_id == current_user.id
+    ))
+    expense = result.scalar_one_or_none()
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     category_name = expense.category.name if expense.category else "Unknown"
     amount = expense.amount
-    db.delete(expense)
-    db.commit()
-    return {"message": f"Deleted {category_name} expense of ammount {amount}"}
\ No newline at end of file
+    version = await bump_data_version(current_user.id, db)
+    await remove_from_rollup(expense, db)
+    await add_tombstones("expense", [expense.id], current_user.id, version, db)
+    await db.delete(expense)
+    await db.commit()
+    return {"message": f"Deleted {category_name} expense of ammount {amount}"}
+
+async def delete_user_expenses(current_user, db, ids=None, start=None, end=None, category_id=None, type=None):
+    """Delete every expense of the current user matching the filters in one statement."""
+    if not (ids or start or end or category_id is not None):
+        raise HTTPException(status_code=400, detail="Provide ids, a date range or a category to delete by")
+    query = filter_user_expense(delete(Expense), current_user, start, end, category_id, type)
+    if ids:
+        query = query.filter(Expense.id.in_(ids))
+    # RETURNING hands back exactly the deleted rows, so the rollups can be
+    # adjusted without a separate, racy SELECT
+    query = query.returning(Expense.category_id, Expense.type, Expense.date, Expense.amount, Expense.id)
+    # Bumped first like every other write, so all of them lock data_versions
+    # before any rollup or expense row
+    version = await bump_data_version(current_user.id, db)
+    rows = (await db.execute(query, execution_options={"synchronize_session": False})).all()
+    if rows:
+        await apply_rollup_rows((row[:4] for row in rows), current_user.id, db, sign=-1)
+        await add_tombstones("expense", [row.id for row in rows], current_user.id, version, db)
+    await db.commit()
+    return {"deleted": len(rows)}
+
+def _read_rows(file, format):
+    """Yield (line number, raw row) pairs from an uploaded CSV or NDJSON stream."""
+    lines = codecs.getreader("utf-8-sig")(file)
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_num, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_num, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_num, e
+
+def _validate_rows(file, format, category_ids, user_id, reject):
+    """Yield insertable rows from an upload, passing invalid ones to reject."""
+    for line_num, raw in _read_rows(file, format):
+        if isinstance(raw, Exception):
+            reject(line_num, str(raw))
+            continue
+        try:
+            expense = ExpenseCreate.model_validate(raw)
+        except ValidationError as e:
+            reject(line_num, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        if expense.category_id not in category_ids:
+            reject(line_num, "category_id: Category not found")
+            continue
+
+        yield {
+            "amount": expense.amount,
+            "description": expense.description,
+            "date": datetime.combine(expense.date, time.min),
+            "type": expense.type,
+            "category_id": expense.category_id,
+            "user_id": user_id
+        }
+
+async def _flush_import_batch(batch, current_user, db):
+    """Insert a batch of validated rows and fold them into the rollups in one transaction."""
+    version = await bump_data_version(current_user.id, db)
+    for row in batch:
+        row["version"] = version
+    await db.execute(insert(Expense), batch)
+    await apply_rollup_rows(
+        ((row["category_id"], row["type"], row["date"], row["amount"]) for row in batch),
+        current_user.id, db
+    )
+    await db.commit()
+
+async def import_user_expenses(file, format, current_user, db):
+    """Stream a CSV or NDJSON upload into the current user's expenses.
+
+    Rows are validated against ExpenseCreate and the user's categories and
+    inserted in batches, so memory stays bounded by the batch size. Parsing
+    and validation run in the threadpool, one batch at a time.
+    """
+    result = await db.execute(select(Category.id).where(Category.user_id == current_user.id))
+    category_ids = set(result.scalars())
+    imported = 0
+    failed = 0
+    errors = []
+
+    def reject(line_num, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"row": line_num, "error": message})
+
+    rows = _validate_rows(file, format, category_ids, current_user.id, reject)
+    while True:
+        try:
+            batch = await run_in_threadpool(lambda: list(islice(rows, IMPORT_BATCH_SIZE)))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Could not parse file: {e}")
+        if not batch:
+            break
+        await _flush_import_batch(batch, current_user, db)
+        imported += len(batch)
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+
+async def _export_rows(current_user, start, end, category_id, type, min_version):
+    """Yield export rows as plain dicts, streamed through a server-side cursor.
+
+    The generator owns its session because it keeps running after the
+    request handler has returned.
+    """
+    async with await read_session(current_user.id, min_version) as db:
+        query = select(
+            Expense.id,
+            Expense.amount,
+            Expense.description,
+            Expense.date,
+            Expense.type,
+            Expense.category_id,
+            Category.name
+        ).join(Category, Category.id == Expense.category_id)
+        query = filter_user_expense(query, current_user, start, end, category_id, type)
+        query = query.order_by(Expense.date.desc(), Expense.id.desc()).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        result = await db.stream(query)
+        async for row in result:
+            values = dict(zip(EXPORT_COLUMNS, row))
+            values["date"] = values["date"].date().isoformat()
+            yield values
+
+async def _export_csv(rows):
+    """Encode rows as CSV, one chunk of bytes per EXPORT_CHUNK_SIZE rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    i = 0
+    async for row in rows:
+        i += 1
+        writer.writerow(row)
+        if i % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+async def _export_ndjson(rows):
+    """Encode rows as newline delimited JSON, one chunk per EXPORT_CHUNK_SIZE rows."""
+    chunk = []
+    async for row in rows:
+        chunk.append(json.dumps(row))
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+def export_user_expenses(format, current_user, start=None, end=None, category_id=None, type=None, min_version=None):
+    """Stream the current user's expenses as CSV or NDJSON."""
+    rows = _export_rows(current_user, start, end, category_id, type, min_version)
+    if format == "csv":
+        body, media_type = _export_csv(rows), "text/csv"
+    else:
+        body, media_type = _export_ndjson(rows), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=expenses.{format}"}
+    )
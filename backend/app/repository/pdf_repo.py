@@ -1,34 +1,365 @@
-from datetime import datetime, timedelta
+import asyncio
+import uuid
+from datetime import datetime, time, timedelta
+from functools import lru_cache
 from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from sqlalchemy import func
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER
-from fastapi.responses import StreamingResponse
-from app.models import Expense, Category
-
-def generate_pdf_report(period, current_user, db):
-    """Generate a PDF report of user expenses for the given period."""
-    # Calculate date range
+from anyio import from_thread
+from fastapi import HTTPException
+from fastapi.responses import Response
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import SingleFlight, TTLCache
+from app.core.config import settings
+from app.core.database import read_session
+from app.models import Category, Expense
+from app.repository.summary_repo import get_user_summary
+from app.repository.version_repo import get_data_version
+
+# Transactions are laid out as a run of small tables instead of one huge
+# one, and fetched from the database a batch at a time while rendering
+REPORT_CHUNK_ROWS = 500
+REPORT_FETCH_ROWS = 2000
+TRANSACTION_COL_WIDTHS = [1, 2.2, 1.3, 0.8, 1]  # inches
+
+# reportlab is imported inside the rendering functions below, so that
+# booting a worker does not pay for it until the first report
+
+# Rendered reports keyed by (user, period, window, data version), so a
+# write simply makes the old entries unreachable; they age out by LRU
+# within the PDF_CACHE_BYTES budget
+report_cache = TTLCache(settings.PDF_CACHE_BYTES, settings.PDF_CACHE_TTL, weigh=len)
+report_jobs = TTLCache(settings.PDF_CACHE_SIZE, settings.PDF_CACHE_TTL)
+# Identical reports requested at the same time (a double click, several
+# tabs) are rendered once
+report_flights = SingleFlight()
+# Strong references to running render tasks so they are not garbage collected
+report_tasks = set()
+
+def report_window(period, start=None, end=None):
+    """Return the (start, end) datetimes a report covers; end is exclusive or None."""
+    if start:
+        if end and end < start:
+            raise HTTPException(status_code=400, detail="end must not be before start")
+        start_date = datetime.combine(start, time.min)
+        end_date = datetime.combine(end + timedelta(days=1), time.min) if end else None
+        return start_date, end_date
+    if end:
+        raise HTTPException(status_code=400, detail="start is required when end is given")
+
     now = datetime.utcnow()
-    if period == "weekly":
-        start_date = now - timedelta(days=7)
-    else:
-        start_date = now - timedelta(days=30)
-    
-    # Get expenses of current user
-    expenses = db.query(Expense).filter(
+    days = 7 if period == "weekly" else 30
+    start_date = datetime.combine((now - timedelta(days=days)).date(), time.min)
+    return start_date, None
+
+async def report_key(period, current_user, db, start=None, end=None):
+    """Return the cache key of the user's report as it stands now."""
+    start_date, end_date = report_window(period, start, end)
+    version = await get_data_version(current_user.id, db)
+    window_end = end_date.date().isoformat() if end_date else "open"
+    return (current_user.id, period, start_date.date().isoformat(), window_end, version)
+
+def report_etag(key):
+    """Return the strong ETag of a report cache key."""
+    return '"' + "-".join(map(str, key)) + '"'
+
+async def render_report(period, current_user, db, key, start=None, end=None):
+    """Return the PDF bytes for key, rendering and caching them on a miss."""
+    content = report_cache.get(key)
+    if content is not None:
+        return content
+    return await report_flights.do(key, lambda: _render_report(period, current_user, db, key, start, end))
+
+async def _render_report(period, current_user, db, key, start, end):
+    start_date, end_date = report_window(period, start, end)
+    now = datetime.utcnow()
+
+    # Totals come from the rollups, not from summing the rows
+    summary_end = (end_date - timedelta(days=1)).date() if end_date else None
+    summary = await get_user_summary(current_user, db, start_date.date(), summary_end)
+
+    # Stream the transaction rows as plain tuples, the renderer pulls them in batches
+    query = select(
+        Expense.date,
+        Expense.description,
+        Category.name,
+        Expense.type,
+        Expense.amount
+    ).join(Category, Category.id == Expense.category_id).where(
         Expense.user_id == current_user.id,
         Expense.date >= start_date
-    ).all()
-    
+    )
+    if end_date:
+        query = query.where(Expense.date < end_date)
+    query = query.order_by(Expense.date.desc(), Expense.id.desc()).execution_options(yield_per=REPORT_FETCH_ROWS)
+    result = await db.stream(query)
+
+    def fetch_batch():
+        return from_thread.run(result.fetchmany, REPORT_FETCH_ROWS)
+
+    label = "Custom" if start else period.capitalize()
+    last_day = end_date - timedelta(days=1) if end_date else now
+    try:
+        # Rendering is CPU bound, keep it off the event loop
+        buffer = await run_in_threadpool(build_pdf, label, start_date, last_day, now, summary, fetch_batch)
+    finally:
+        await result.close()
+    content = buffer.getvalue()
+    if len(content) <= settings.PDF_CACHE_MAX_REPORT_BYTES:
+        report_cache.set(key, content)
+    return content
+
+def pdf_response(period, key, content):
+    """Wrap rendered report bytes in a cacheable download response."""
+    return Response(
+        content=content,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename=expense_report_{period}.pdf",
+            "ETag": report_etag(key),
+            "Cache-Control": "private, no-cache"
+        }
+    )
+
+async def generate_pdf_report(period, current_user, db, if_none_match=None, start=None, end=None):
+    """Generate a PDF report of user expenses for the given period or date range."""
+    key = await report_key(period, current_user, db, start, end)
+    if if_none_match == report_etag(key):
+        return Response(status_code=304, headers={"ETag": report_etag(key)})
+    content = await render_report(period, current_user, db, key, start, end)
+    return pdf_response(period, key, content)
+
+async def _run_report_job(job, current_user):
+    """Render a submitted report with its own session."""
+    try:
+        # The key ends with the data version the report was submitted at
+        async with await read_session(current_user.id, job["key"][-1]) as db:
+            content = await render_report(job["period"], current_user, db, job["key"], job["start"], job["end"])
+        # The file is handed over through the cache, however large it is
+        report_cache.set(job["key"], content)
+        if report_cache.get(job["key"]) is None:
+            raise ValueError("Report is too large to keep, download it directly")
+        job["status"] = "done"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+
+async def submit_report_job(period, current_user, db, start=None, end=None):
+    """Queue a report for background rendering and return its job.
+
+    Submitting the same report again while it is pending or cached returns
+    the existing job.
+    """
+    key = await report_key(period, current_user, db, start, end)
+    job = report_jobs.get(key)
+    if job is not None and job["status"] != "failed":
+        return job
+
+    job = {
+        "id": uuid.uuid4().hex,
+        "period": period,
+        "start": start,
+        "end": end,
+        "key": key,
+        "status": "pending",
+        "error": None
+    }
+    if report_cache.get(key) is not None:
+        job["status"] = "done"
+    else:
+        task = asyncio.create_task(_run_report_job(job, current_user))
+        report_tasks.add(task)
+        task.add_done_callback(report_tasks.discard)
+    report_jobs.set(key, job)
+    report_jobs.set(job["id"], job)
+    return job
+
+def get_report_job(job_id, current_user):
+    """Return a report job of the current user."""
+    job = report_jobs.get(job_id)
+    if job is None or job["key"][0] != current_user.id:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+def fetch_report_job(job_id, current_user, if_none_match=None):
+    """Return the rendered PDF of a finished report job."""
+    job = get_report_job(job_id, current_user)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Report job is {job['status']}")
+    if if_none_match == report_etag(job["key"]):
+        return Response(status_code=304, headers={"ETag": report_etag(job["key"])})
+    content = report_cache.get(job["key"])
+    if content is None:
+        raise HTTPException(status_code=404, detail="Report expired, submit it again")
+    return pdf_response(job["period"], job["key"], content)
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """Build the paragraph and table styles once per process."""
+    from reportlab.platypus import TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+
+    styles = getSampleStyleSheet()
+    transaction_header = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ]
+    transaction_body = [
+        ('ALIGN', (0, 0), (2, -1), 'LEFT'),
+        ('ALIGN', (3, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('PADDING', (0, 0), (-1, -1), 8),
+
+        # Borders
+        ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#dee2e6')),
+        ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
+    ]
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#1a1a1a'),
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        'subtitle': ParagraphStyle(
+            'Subtitle',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#666666'),
+            alignment=TA_CENTER,
+            spaceAfter=20
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            textColor=colors.HexColor('#2c3e50'),
+            spaceAfter=12,
+            spaceBefore=12,
+            fontName='Helvetica-Bold'
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.HexColor('#999999'),
+            alignment=TA_CENTER
+        ),
+        'category_table': TableStyle([
+            # Header
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('PADDING', (0, 0), (-1, -1), 10),
+
+            # Data rows
+            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa')),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 11),
+
+            # Borders
+            ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#dee2e6')),
+            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
+        ]),
+        # First transactions chunk carries the header row
+        'transaction_first': TableStyle(transaction_header + transaction_body + [
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 11),
+        ]),
+        'transaction_rest': TableStyle(transaction_body + [
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ]),
+    }
+
+class LazyFlowables(list):
+    """Flowable list that pulls more flowables from a generator as the document consumes it.
+
+    SimpleDocTemplate.build only ever looks at the front of the list, so
+    keeping a couple of flowables buffered is enough and the rest of the
+    report never has to exist in memory at once.
+    """
+
+    def __init__(self, head, source):
+        super().__init__(head)
+        self.source = source
+
+    def _fill(self, size):
+        while self.source is not None and super().__len__() < size:
+            try:
+                self.append(next(self.source))
+            except StopIteration:
+                self.source = None
+
+    def __len__(self):
+        self._fill(2)
+        return super().__len__()
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and index >= 0:
+            self._fill(index + 2)
+        return super().__getitem__(index)
+
+def _transaction_tables(fetch_batch):
+    """Yield the transactions section as tables of REPORT_CHUNK_ROWS rows each."""
+    from reportlab.platypus import Table
+    from reportlab.lib.units import inch
+
+    col_widths = [width * inch for width in TRANSACTION_COL_WIDTHS]
+    styles = report_styles()
+    table_data = [['Date', 'Description', 'Category', 'Type', 'Amount']]
+    first = True
+    while True:
+        rows = fetch_batch()
+        for date, description, category, type, amount in rows:
+            table_data.append([
+                date.strftime('%d %b %Y'),
+                description[:28] + '...' if len(description) > 28 else description,
+                category,
+                type.capitalize(),
+                f"Rs. {amount:.2f}"
+            ])
+            if len(table_data) >= REPORT_CHUNK_ROWS:
+                table = Table(table_data, colWidths=col_widths)
+                table.setStyle(styles['transaction_first'] if first else styles['transaction_rest'])
+                yield table
+                table_data = []
+                first = False
+        if not rows:
+            break
+    if table_data or first:
+        table = Table(table_data, colWidths=col_widths)
+        table.setStyle(styles['transaction_first'] if first else styles['transaction_rest'])
+        yield table
+
+def build_pdf(label, start_date, end_date, now, summary, fetch_batch):
+    """Render the report document and return it as a rewound buffer.
+
+    fetch_batch is called repeatedly for lists of (date, description,
+    category, type, amount) rows until it returns an empty list.
+    """
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+
     # Generate PDF with margins
     buffer = BytesIO()
     doc = SimpleDocTemplate(
-        buffer, 
+        buffer,
         pagesize=letter,
         rightMargin=20,
         leftMargin=20,
@@ -36,60 +367,29 @@ def generate_pdf_report(period, current_user, db):
         bottomMargin=20
     )
     elements = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#666666'),
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
+    styles = report_styles()
+
     # Title
-    title = Paragraph(f"Expense Report", title_style)
+    title = Paragraph(f"Expense Report", styles['title'])
     elements.append(title)
-    
+
     subtitle = Paragraph(
-        f"{period.capitalize()} Report | {start_date.strftime('%B %d, %Y')} - {now.strftime('%B %d, %Y')}", 
-        subtitle_style
+        f"{label} Report | {start_date.strftime('%B %d, %Y')} - {end_date.strftime('%B %d, %Y')}",
+        styles['subtitle']
     )
     elements.append(subtitle)
     elements.append(Spacer(1, 20))
-    
-    # Calculate totals
-    total_income = sum(e.amount for e in expenses if e.type == "income")
-    total_expense = sum(e.amount for e in expenses if e.type == "expense")
-    balance = total_income - total_expense
-    
+
+    total_income = summary["total_income"]
+    total_expense = summary["total_expense"]
+    balance = summary["balance"]
+
     # Summary cards in table format
     summary_data = [
         ['Total Income', 'Total Expenses', 'Balance'],
         [f"Rs. {total_income:.2f}", f"Rs. {total_expense:.2f}", f"Rs. {balance:.2f}"]
     ]
-    
+
     summary_table = Table(summary_data, colWidths=[2*inch, 2*inch, 2*inch])
     summary_table.setStyle(TableStyle([
         # Header row
@@ -117,103 +417,32 @@ def generate_pdf_report(period, current_user, db):
     ]))
     elements.append(summary_table)
     elements.append(Spacer(1, 25))
-    
+
     # Category breakdown
-    category_data = db.query(
-        Category.name,
-        func.sum(Expense.amount).label('total')
-    ).join(Expense).filter(
-        Expense.user_id == current_user.id,
-        Expense.date >= start_date,
-        Expense.type == "expense"
-    ).group_by(Category.name).all()
-    
+    category_data = [(c["name"], c["expense"]) for c in summary["categories"] if c["expense"] > 0]
+
     if category_data:
-        elements.append(Paragraph("Category Breakdown", heading_style))
+        elements.append(Paragraph("Category Breakdown", styles['heading']))
         cat_table_data = [['Category', 'Amount', 'Percentage']]
-        
+
         for cat_name, total in category_data:
             percentage = (total / total_expense * 100) if total_expense > 0 else 0
             cat_table_data.append([cat_name, f"Rs. {total:.2f}", f"{percentage:.1f}%"])
-        
+
         cat_table = Table(cat_table_data, colWidths=[3*inch, 1.5*inch, 1.5*inch])
-        cat_table.setStyle(TableStyle([
-            # Header
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('PADDING', (0, 0), (-1, -1), 10),
-            
-            # Data rows
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa')),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 11),
-            
-            # Borders
-            ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#dee2e6')),
-            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
-        ]))
+        cat_table.setStyle(styles['category_table'])
         elements.append(cat_table)
         elements.append(Spacer(1, 25))
-    
-    # Transactions table
-    elements.append(Paragraph("Recent Transactions", heading_style))
-    table_data = [['Date', 'Description', 'Category', 'Type', 'Amount']]
-    
-    for expense in expenses:
-        table_data.append([
-            expense.date.strftime('%d %b %Y'),
-            expense.description[:28] + '...' if len(expense.description) > 28 else expense.description,
-            expense.category.name,
-            expense.type.capitalize(),
-            f"Rs. {expense.amount:.2f}"
-        ])
-    
-    table = Table(table_data, colWidths=[1*inch, 2.2*inch, 1.3*inch, 0.8*inch, 1*inch])
-    table.setStyle(TableStyle([
-        # Header
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('ALIGN', (0, 0), (2, -1), 'LEFT'),
-        ('ALIGN', (3, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('PADDING', (0, 0), (-1, -1), 8),
-        
-        # Data rows
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 11),
-        
-        # Borders
-        ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#dee2e6')),
-        ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
-    ]))
-    elements.append(table)
-    
-    # Footer
-    elements.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.HexColor('#999999'),
-        alignment=TA_CENTER
-    )
-    footer = Paragraph(f"Generated on {now.strftime('%B %d, %Y at %I:%M %p')}", footer_style)
-    elements.append(footer)
-    
-    doc.build(elements)
+
+    # Transactions tables, generated while the document is being laid out
+    elements.append(Paragraph("Recent Transactions", styles['heading']))
+
+    def remaining():
+        yield from _transaction_tables(fetch_batch)
+        # Footer
+        yield Spacer(1, 30)
+        yield Paragraph(f"Generated on {now.strftime('%B %d, %Y at %I:%M %p')}", styles['footer'])
+
+    doc.build(LazyFlowables(elements, remaining()))
     buffer.seek(0)
-    
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=expense_report_{period}.pdf"}
-    )
\ No newline at end of file
+    return buffer
@@ -0,0 +1,106 @@
+import base64
+import re
+from fastapi import HTTPException
+from sqlalchemy import column, func, literal, literal_column, select, table, union_all
+from app.models import Category, Expense
+from app.repository.expense_repo import expense_row, filter_user_expense
+
+SEARCH_MAX_TERMS = 8
+
+# The FTS5 table (SQLite) and tsvector index (PostgreSQL) are created by the
+# 0004 migration, the FTS5 table gains user_id in 0008
+expenses_fts = table("expenses_fts", column("rowid"))
+fts_match = literal_column("expenses_fts")
+# Must match the indexed expression exactly for the planner to use the index
+pg_vector = func.to_tsvector(literal_column("'simple'::regconfig"), func.coalesce(Expense.description, literal_column("''")))
+
+def search_terms(q):
+    """Split a query into lower-cased word terms, each later matched as a prefix."""
+    return re.findall(r"\w+", q.lower())[:SEARCH_MAX_TERMS]
+
+def encode_offset(offset):
+    return base64.urlsafe_b64encode(f"offset|{offset}".encode()).decode()
+
+def decode_offset(cursor):
+    try:
+        kind, value = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if kind != "offset":
+            raise ValueError(kind)
+        return int(value)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _matching_categories(terms, current_user, db):
+    """Return ids of the user's categories whose name has a word starting with every term."""
+    result = await db.execute(select(Category.id, Category.name).where(Category.user_id == current_user.id))
+    matches = []
+    for category_id, name in result:
+        words = re.findall(r"\w+", (name or "").lower())
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            matches.append(category_id)
+    return matches
+
+async def search_user_expenses(q, current_user, db, limit=50, cursor=None, start=None, end=None, category_id=None, type=None):
+    """Rank the user's expenses by how well their description or category name matches q.
+
+    Every term must match the start of a word. Returns ExpenseResponse
+    shaped dicts, best match first, and the cursor of the next page.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return [], None
+    offset = decode_offset(cursor) if cursor else 0
+    category_ids = await _matching_categories(terms, current_user, db)
+
+    # Description and category hits are separate branches of a UNION, each
+    # narrowed to the user and served by its own index, rather than one OR
+    # that no index can serve
+    if db.get_bind().dialect.name == "postgresql":
+        ts_query = func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{term}:*" for term in terms))
+        description_hits = select(
+            Expense.id.label("id"),
+            func.ts_rank(pg_vector, ts_query).label("score"),
+            literal(0).label("category_hit")
+        ).where(Expense.user_id == current_user.id, pg_vector.op("@@")(ts_query))
+    else:
+        # user_id is indexed next to the description (0008 migration); bm25()
+        # weighs only the description and is lower for better matches, so it
+        # is flipped for higher to always rank first
+        fts_query = f'user_id : "{current_user.id}" AND description : (' + " ".join(f'"{term}"*' for term in terms) + ")"
+        description_hits = select(
+            expenses_fts.c.rowid.label("id"),
+            (-func.bm25(fts_match, 1.0, 0.0)).label("score"),
+            literal(0).label("category_hit")
+        ).where(fts_match.op("MATCH")(fts_query))
+    ranked = description_hits.subquery()
+    if category_ids:
+        category_hits = select(
+            Expense.id.label("id"),
+            literal(0.0).label("score"),
+            literal(1).label("category_hit")
+        ).where(Expense.user_id == current_user.id, Expense.category_id.in_(category_ids))
+        hits = union_all(description_hits, category_hits).subquery()
+        # An expense hit by both branches keeps its description score
+        ranked = select(
+            hits.c.id,
+            func.max(hits.c.score).label("score"),
+            func.max(hits.c.category_hit).label("category_hit")
+        ).group_by(hits.c.id).subquery()
+
+    query = select(
+        Expense.id,
+        Expense.amount,
+        Expense.description,
+        Expense.date,
+        Expense.type,
+        Expense.category_id,
+        Category.name.label("category_name"),
+    ).join(Category, Category.id == Expense.category_id).join(ranked, ranked.c.id == Expense.id)
+    query = filter_user_expense(query, current_user, start, end, category_id, type)
+    # Category name hits first, then by description relevance
+    query = query.order_by(ranked.c.category_hit.desc(), ranked.c.score.desc(), Expense.date.desc(), Expense.id.desc())
+    result = await db.execute(query.offset(offset).limit(limit + 1))
+    rows = result.all()
+    if len(rows) > limit:
+        return [expense_row(row) for row in rows[:limit]], encode_offset(offset + limit)
+    return [expense_row(row) for row in rows], None
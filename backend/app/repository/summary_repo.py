@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from app.core.database import dialect_insert
+from app.models import ExpenseRollup, Category, CategoryMonthTotal
+
+def _day(value):
+    """Return the calendar day of an expense date."""
+    return value.date() if isinstance(value, datetime) else value
+
+def _month(value):
+    """Return the first day of the month of an expense date."""
+    return _day(value).replace(day=1)
+
+async def apply_rollup_delta(user_id, category_id, type, day, amount, count, db):
+    """Add amount and count to a rollup bucket inside the caller's transaction."""
+    insert = dialect_insert(db)
+    stmt = insert(ExpenseRollup).values(
+        user_id=user_id,
+        category_id=category_id,
+        type=type,
+        day=_day(day),
+        total=amount,
+        count=count
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'day', 'category_id', 'type'],
+        set_={
+            'total': ExpenseRollup.total + stmt.excluded.total,
+            'count': ExpenseRollup.count + stmt.excluded.count
+        }
+    )
+    await db.execute(stmt)
+
+async def apply_month_delta(user_id, category_id, month, amount, count, db):
+    """Add amount and count to a category's month total inside the caller's transaction."""
+    insert = dialect_insert(db)
+    stmt = insert(CategoryMonthTotal).values(
+        user_id=user_id,
+        category_id=category_id,
+        month=month,
+        total=amount,
+        count=count
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'category_id', 'month'],
+        set_={
+            'total': CategoryMonthTotal.total + stmt.excluded.total,
+            'count': CategoryMonthTotal.count + stmt.excluded.count
+        }
+    )
+    await db.execute(stmt)
+
+async def add_to_rollup(expense, db):
+    """Account for a newly created expense in the rollups."""
+    await apply_rollup_rows([(expense.category_id, expense.type, expense.date, expense.amount)], expense.user_id, db)
+
+async def remove_from_rollup(expense, db):
+    """Remove an expense's contribution from the rollups."""
+    await apply_rollup_rows([(expense.category_id, expense.type, expense.date, expense.amount)], expense.user_id, db, sign=-1)
+
+async def apply_rollup_rows(rows, user_id, db, sign=1):
+    """Add (or with sign=-1 remove) (category_id, type, date, amount) rows to the rollups.
+
+    Issues one upsert per day bucket, plus one per category month for the
+    spend (type expense) rows that budgets are checked against.
+    """
+    deltas = {}
+    month_deltas = {}
+    for category_id, type, day, amount in rows:
+        key = (category_id, type, _day(day))
+        total, count = deltas.get(key, (0.0, 0))
+        deltas[key] = (total + amount, count + 1)
+        if type == "expense":
+            key = (category_id, _month(day))
+            total, count = month_deltas.get(key, (0.0, 0))
+            month_deltas[key] = (total + amount, count + 1)
+    for (category_id, type, day), (total, count) in deltas.items():
+        await apply_rollup_delta(user_id, category_id, type, day, sign * total, sign * count, db)
+    for (category_id, month), (total, count) in month_deltas.items():
+        await apply_month_delta(user_id, category_id, month, sign * total, sign * count, db)
+
+def _bucket_start(day, granularity):
+    """Return the first day of the bucket a day falls into."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+async def get_user_summary(current_user, db, start=None, end=None, granularity="month"):
+    """Return totals plus per-category and per-period breakdowns for the current user."""
+    # Buckets emptied by deletes and updates stay behind with count 0
+    filters = [ExpenseRollup.user_id == current_user.id, ExpenseRollup.count > 0]
+    if start:
+        filters.append(ExpenseRollup.day >= start)
+    if end:
+        filters.append(ExpenseRollup.day <= end)
+
+    totals = {"income": 0.0, "expense": 0.0}
+    periods = {}
+    day_rows = await db.execute(select(
+        ExpenseRollup.day,
+        ExpenseRollup.type,
+        func.sum(ExpenseRollup.total)
+    ).where(*filters).group_by(ExpenseRollup.day, ExpenseRollup.type))
+    for day, type, total in day_rows:
+        if type not in totals:
+            continue
+        totals[type] += total
+        bucket = periods.setdefault(_bucket_start(day, granularity), {"income": 0.0, "expense": 0.0})
+        bucket[type] += total
+
+    categories = {}
+    category_rows = await db.execute(select(
+        Category.id,
+        Category.name,
+        ExpenseRollup.type,
+        func.sum(ExpenseRollup.total)
+    ).join(Category, Category.id == ExpenseRollup.category_id).where(*filters).group_by(
+        Category.id, Category.name, ExpenseRollup.type
+    ))
+    for category_id, name, type, total in category_rows:
+        if type not in totals:
+            continue
+        entry = categories.setdefault(category_id, {"category_id": category_id, "name": name, "income": 0.0, "expense": 0.0})
+        entry[type] += total
+
+    return {
+        "total_income": totals["income"],
+        "total_expense": totals["expense"],
+        "balance": totals["income"] - totals["expense"],
+        "categories": list(categories.values()),
+        "periods": [{"period": period, **values} for period, values in sorted(periods.items())]
+    }
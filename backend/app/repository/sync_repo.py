@@ -0,0 +1,129 @@
+import asyncio
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Category, Expense, SyncTombstone
+from app.repository.expense_repo import expense_row
+from app.repository.version_repo import get_data_version
+
+# Every write bumps the user's data version first and stamps the rows it
+# touches (and tombstones for the rows it deletes) with the new version, so
+# "everything with version > cursor" is exactly what changed since cursor
+
+DELETED_KEYS = {"expense": "deleted_expenses", "category": "deleted_categories"}
+
+# Open change streams of this process, woken right after a user's commit;
+# streams also poll, which covers writes made by other workers
+change_listeners = {}
+
+@event.listens_for(Session, "after_commit")
+def notify_change_listeners(session):
+    for user_id in session.info.pop("changed_users", ()):
+        for listener in change_listeners.get(user_id, ()):
+            listener.set()
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_users(session):
+    session.info.pop("changed_users", None)
+
+def parse_cursor(since):
+    try:
+        return int(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def get_user_changes(current_user, db, since=None):
+    """Return what changed for the current user since a sync cursor.
+
+    Without a cursor, or when more than SYNC_MAX_ROWS rows changed, the
+    response only carries the current cursor with reset set: the client
+    should reload the lists and sync from that cursor. Fetching the cursor
+    before the lists means nothing written in between is missed.
+    """
+    cursor = await get_data_version(current_user.id, db)
+    changes = {"cursor": str(cursor), "reset": False, "expenses": [], "categories": [], "deleted_expenses": [], "deleted_categories": []}
+    if since is None:
+        changes["reset"] = True
+        return changes
+    since = parse_cursor(since)
+    if since >= cursor:
+        return changes
+
+    # Bounded by cursor so rows of writes that commit meanwhile wait for the next sync
+    limit = settings.SYNC_MAX_ROWS + 1
+    expense_rows = (await db.execute(select(
+        Expense.id,
+        Expense.amount,
+        Expense.description,
+        Expense.date,
+        Expense.type,
+        Expense.category_id,
+        Category.name.label("category_name")
+    ).join(Category, Category.id == Expense.category_id).where(
+        Expense.user_id == current_user.id,
+        Expense.version > since,
+        Expense.version <= cursor
+    ).limit(limit))).all()
+    category_rows = (await db.execute(select(Category.id, Category.name).where(
+        Category.user_id == current_user.id,
+        Category.version > since,
+        Category.version <= cursor
+    ).limit(limit))).all()
+    tombstones = (await db.execute(select(SyncTombstone.entity, SyncTombstone.entity_id).where(
+        SyncTombstone.user_id == current_user.id,
+        SyncTombstone.version > since,
+        SyncTombstone.version <= cursor
+    ).limit(limit))).all()
+
+    if len(expense_rows) + len(category_rows) + len(tombstones) > settings.SYNC_MAX_ROWS:
+        changes["reset"] = True
+        return changes
+    changes["expenses"] = [expense_row(row) for row in expense_rows]
+    changes["categories"] = [{"id": row.id, "name": row.name} for row in category_rows]
+    # SQLite can reuse the id of a deleted row; a row that exists now wins over its tombstone
+    live = {"expense": {row.id for row in expense_rows}, "category": {row.id for row in category_rows}}
+    for row in tombstones:
+        if row.entity_id not in live[row.entity]:
+            changes[DELETED_KEYS[row.entity]].append(row.entity_id)
+    return changes
+
+async def _change_events(current_user, since):
+    """Yield a server-sent event whenever the user's data changes."""
+    listener = asyncio.Event()
+    change_listeners.setdefault(current_user.id, set()).add(listener)
+    try:
+        while True:
+            listener.clear()
+            async with SessionLocal() as db:
+                changes = await get_user_changes(current_user, db, since)
+            if changes["cursor"] != since or changes["reset"]:
+                since = changes["cursor"]
+                yield f"event: sync\ndata: {orjson.dumps(changes).decode()}\n\n"
+            else:
+                yield ": keepalive\n\n"
+            try:
+                await asyncio.wait_for(listener.wait(), settings.SYNC_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        listeners = change_listeners.get(current_user.id)
+        listeners.discard(listener)
+        if not listeners:
+            change_listeners.pop(current_user.id, None)
+
+async def stream_user_changes(current_user, db, since=None):
+    """Stream the sync feed as server-sent events, one per change."""
+    if since is not None:
+        parse_cursor(since)
+    # The request's session would otherwise hold a pooled connection for as
+    # long as the stream stays open; each poll opens a short session instead
+    await db.close()
+    return StreamingResponse(
+        _change_events(current_user, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
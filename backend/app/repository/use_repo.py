@@ -1,25 +1,35 @@
 from fastapi import HTTPException
-from app.core.auth import get_password_hash, verify_password, create_access_token
+from sqlalchemy import select
+from app.core.auth import get_password_hash, verify_and_update_password, create_access_token, run_hash
 from app.models import User
 
-def register_user(user, db):
+async def register_user(user, db):
     """Register a new user."""
-    db_user = db.query(User).filter(User.username == user.username).first()
+    result = await db.execute(select(User).where(User.username == user.username))
+    db_user = result.scalar_one_or_none()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await run_hash(get_password_hash, user.password)
     new_user = User(username=user.username, email=user.email, password=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
-def login_user(form_data, db):
+async def login_user(form_data, db):
     """Authenticate user and return access token."""
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password):
+    result = await db.execute(select(User).where(User.username == form_data.username))
+    user = result.scalar_one_or_none()
+    if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
+    valid, new_hash = await run_hash(verify_and_update_password, form_data.password, user.password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+    if new_hash:
+        # Argon2 parameters changed since this hash was stored, upgrade it transparently
+        user.password = new_hash
+        await db.commit()
     
     access_token = create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
@@ -0,0 +1,64 @@
+import hashlib
+from fastapi.responses import Response
+from sqlalchemy import insert, literal, select
+from app.core.database import dialect_insert, pin_to_primary
+from app.models import DataVersion, Expense, SyncTombstone
+
+async def bump_data_version(user_id, db):
+    """Increment the user's data version inside the caller's transaction and return it.
+
+    The upsert keeps the user's data_versions row locked until commit, so a
+    user's writes commit in version order and the rows a write stamps with
+    the returned version are visible as soon as that version is.
+    """
+    upsert = dialect_insert(db)
+    stmt = upsert(DataVersion).values(user_id=user_id, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={'version': DataVersion.version + 1}
+    ).returning(DataVersion.version)
+    version = (await db.execute(stmt)).scalar_one()
+    # Picked up by the after_commit hook in sync_repo to wake change streams
+    db.info.setdefault("changed_users", set()).add(user_id)
+    pin_to_primary(user_id, version)
+    return version
+
+async def add_tombstones(entity, ids, user_id, version, db):
+    """Record deleted rows at a data version so that sync clients learn about them."""
+    if ids:
+        await db.execute(insert(SyncTombstone), [
+            {"user_id": user_id, "entity": entity, "entity_id": entity_id, "version": version}
+            for entity_id in ids
+        ])
+
+async def add_expense_tombstones_for_category(category_id, user_id, version, db):
+    """Record every expense of a category that is about to be deleted with it, in one statement."""
+    await db.execute(insert(SyncTombstone).from_select(
+        ["user_id", "entity", "entity_id", "version"],
+        select(Expense.user_id, literal("expense"), Expense.id, literal(version)).where(
+            Expense.category_id == category_id, Expense.user_id == user_id
+        )
+    ))
+
+async def get_data_version(user_id, db):
+    """Return the user's current data version, 0 if they never wrote anything."""
+    result = await db.execute(select(DataVersion.version).where(DataVersion.user_id == user_id))
+    return result.scalar_one_or_none() or 0
+
+def listing_etag(name, user_id, version, query=""):
+    """Return the strong ETag of a listing at a data version, scoped to its query string."""
+    digest = hashlib.md5(query.encode()).hexdigest()[:8]
+    return f'"{name}-{user_id}-{version}-{digest}"'
+
+async def not_modified(name, current_user, db, request, response, if_none_match=None):
+    """Tag response with the listing's ETag, or return a 304 if the client already has it.
+
+    Only the data version is read, so an unchanged listing never runs its query.
+    """
+    version = await get_data_version(current_user.id, db)
+    etag = listing_etag(name, current_user.id, version, request.url.query)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date
+from app.schema import BudgetCreate, BudgetUpdate, BudgetResponse, BudgetStatus
+from app.core.auth import get_current_user, get_read_db
+from app.core.database import get_db
+from app.models import User
+from app.repository.budget_repo import create_user_budget, get_user_budgets, update_user_budget, delete_user_budget, get_user_budget_status
+
+router = APIRouter(
+    tags=['Budget'],
+)
+
+@router.post("/budgets", response_model=BudgetResponse)
+async def create_budget(budget: BudgetCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await create_user_budget(budget, current_user, db)
+
+@router.get("/budgets", response_model=List[BudgetResponse])
+async def get_budgets(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    return await get_user_budgets(current_user, db)
+
+@router.get("/budgets/status", response_model=List[BudgetStatus])
+async def get_budget_status(month: Optional[date] = None, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    return await get_user_budget_status(current_user, db, month)
+
+@router.put("/budgets/{budget_id}", response_model=BudgetResponse)
+async def update_budget(budget_id: int, budget: BudgetUpdate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await update_user_budget(budget_id, budget, current_user, db)
+
+@router.delete("/budgets/{budget_id}")
+async def delete_budget(budget_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await delete_user_budget(budget_id, current_user, db)
@@ -1,24 +1,36 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.schema import CategoryResponse, CategoryCreate
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_read_db
 from app.core.database import get_db
+from app.core.responses import ORJSONResponse
 from app.models import User
 from app.repository.category_repo import create_user_category, get_user_category, delete_user_category
+from app.repository.version_repo import not_modified
 
 router = APIRouter(
     tags=['Category'],
 )
 
 @router.post("/categories", response_model=CategoryResponse)
-def create_category(category: CategoryCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return create_user_category(category, current_user, db)
+async def create_category(category: CategoryCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await create_user_category(category, current_user, db)
 
-@router.get("/categories", response_model=List[CategoryResponse])
-def get_categories(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return get_user_category(current_user, db)
+@router.get("/categories", response_model=List[CategoryResponse], response_class=ORJSONResponse)
+async def get_categories(
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    cached = await not_modified("categories", current_user, db, request, response, if_none_match)
+    if cached:
+        return cached
+    categories = await get_user_category(current_user, db)
+    return ORJSONResponse(categories, headers=response.headers)
 
 @router.delete("/categories/{category_id}")
-def delete_category(category_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return delete_user_category(category_id, current_user, db)
\ No newline at end of file
+async def delete_category(category_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await delete_user_category(category_id, current_user, db)
\ No newline at end of file
@@ -1,29 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.schema import ExpenseResponse, ExpenseCreate
-from app.core.auth import get_current_user
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from datetime import date
+from app.schema import ExpenseResponse, ExpenseCreate, SummaryResponse, AnalyticsResponse, ImportResponse, BulkDeleteResponse, BatchRequest, BatchResponse
+from app.core.auth import get_current_user, get_read_db
 from app.core.database import get_db
+from app.core.ratelimit import list_rate_limit
+from app.core.responses import ORJSONResponse
 from app.models import User
 
-from app.repository.expense_repo import create_user_expense, get_user_expense, update_user_expense, delete_user_expense
+from app.repository.expense_repo import create_user_expense, get_user_expense, update_user_expense, delete_user_expense, delete_user_expenses, import_user_expenses, export_user_expenses
+from app.repository.summary_repo import get_user_summary
+from app.repository.analytics_repo import get_user_analytics
+from app.repository.search_repo import search_user_expenses
+from app.repository.batch_repo import apply_expense_batch
+from app.repository.version_repo import not_modified
 
 router = APIRouter(
     tags=['Expense'],
 )
 
 @router.post("/expenses", response_model=ExpenseResponse)
-def create_expense(expense: ExpenseCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return create_user_expense(expense, current_user, db)
+async def create_expense(expense: ExpenseCreate, response: Response, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await create_user_expense(expense, current_user, db, response)
 
-@router.get("/expenses", response_model=List[ExpenseResponse])
-def get_expenses(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return get_user_expense(current_user, db)
+@router.post("/expenses/batch", response_model=BatchResponse, response_class=ORJSONResponse)
+async def batch_expenses(
+    batch: BatchRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=100),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await apply_expense_batch(batch, current_user, db, idempotency_key)
+
+@router.get("/expenses", response_model=List[ExpenseResponse], response_class=ORJSONResponse, dependencies=[Depends(list_rate_limit)])
+async def get_expenses(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    category_id: Optional[int] = None,
+    type: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    cached = await not_modified("expenses", current_user, db, request, response, if_none_match)
+    if cached:
+        return cached
+    expenses, next_cursor = await get_user_expense(current_user, db, limit, cursor, start, end, category_id, type, response.headers["ETag"])
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return ORJSONResponse(expenses, headers=response.headers)
+
+@router.get("/expenses/search", response_model=List[ExpenseResponse], response_class=ORJSONResponse, dependencies=[Depends(list_rate_limit)])
+async def search_expenses(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    category_id: Optional[int] = None,
+    type: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    expenses, next_cursor = await search_user_expenses(q, current_user, db, limit, cursor, start, end, category_id, type)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return ORJSONResponse(expenses, headers=response.headers)
+
+@router.post("/expenses/import", response_model=ImportResponse)
+async def import_expenses(
+    file: UploadFile,
+    format: Literal["csv", "ndjson"] = "csv",
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await import_user_expenses(file.file, format, current_user, db)
+
+@router.get("/expenses/export", dependencies=[Depends(list_rate_limit)])
+async def export_expenses(
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    category_id: Optional[int] = None,
+    type: Optional[str] = None,
+    x_min_data_version: Optional[int] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    return export_user_expenses(format, current_user, start, end, category_id, type, x_min_data_version)
+
+@router.get("/expenses/summary", response_model=SummaryResponse)
+async def get_summary(
+    request: Request,
+    response: Response,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    granularity: Literal["day", "week", "month"] = "month",
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    cached = await not_modified("summary", current_user, db, request, response, if_none_match)
+    if cached:
+        return cached
+    return await get_user_summary(current_user, db, start, end, granularity)
+
+@router.get("/expenses/analytics", response_model=AnalyticsResponse)
+async def get_analytics(
+    request: Request,
+    response: Response,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    granularity: Literal["day", "week", "month"] = "month",
+    window: int = Query(3, ge=1, le=90),
+    horizon: int = Query(3, ge=0, le=24),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    cached = await not_modified("analytics", current_user, db, request, response, if_none_match)
+    if cached:
+        return cached
+    return await get_user_analytics(current_user, db, start, end, granularity, window, horizon)
 
 @router.put("/expenses/{expense_id}", response_model=ExpenseResponse)
-def update_expense(expense_id: int, expense: ExpenseCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return update_user_expense(expense_id, expense, current_user, db)
+async def update_expense(expense_id: int, expense: ExpenseCreate, response: Response, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await update_user_expense(expense_id, expense, current_user, db, response)
+
+@router.delete("/expenses", response_model=BulkDeleteResponse)
+async def delete_expenses(
+    ids: Optional[List[int]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    category_id: Optional[int] = None,
+    type: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await delete_user_expenses(current_user, db, ids, start, end, category_id, type)
 
 @router.delete("/expenses/{expense_id}")
-def delete_expense(expense_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return delete_user_expense(expense_id, current_user, db)
\ No newline at end of file
+async def delete_expense(expense_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await delete_user_expense(expense_id, current_user, db)
\ No newline at end of file
@@ -1,14 +1,42 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.auth import get_current_user
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date
+from app.schema import ReportJobResponse
+from app.core.auth import get_current_user, get_read_db
+from app.core.ratelimit import pdf_rate_limit
 from app.models import User
-from app.repository.pdf_repo import generate_pdf_report
+from app.repository.pdf_repo import generate_pdf_report, submit_report_job, get_report_job, fetch_report_job
 
 router = APIRouter(
     tags=['PDF'],
 )
 
-@router.get("/expenses/report/pdf")
-def generate_pdf(period: str = "monthly", current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return generate_pdf_report(period, current_user, db)
\ No newline at end of file
+@router.get("/expenses/report/pdf", dependencies=[Depends(pdf_rate_limit)])
+async def generate_pdf(
+    period: str = "monthly",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    return await generate_pdf_report(period, current_user, db, if_none_match, start, end)
+
+@router.post("/expenses/report/pdf/jobs", response_model=ReportJobResponse, status_code=202, dependencies=[Depends(pdf_rate_limit)])
+async def submit_pdf_job(
+    period: str = "monthly",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    return await submit_report_job(period, current_user, db, start, end)
+
+@router.get("/expenses/report/pdf/jobs/{job_id}", response_model=ReportJobResponse)
+async def get_pdf_job(job_id: str, current_user: User = Depends(get_current_user)):
+    return get_report_job(job_id, current_user)
+
+@router.get("/expenses/report/pdf/jobs/{job_id}/file")
+async def fetch_pdf_job(job_id: str, if_none_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user)):
+    return fetch_report_job(job_id, current_user, if_none_match)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.schema import SyncResponse
+from app.core.auth import get_current_user
+from app.core.database import get_db
+from app.core.responses import ORJSONResponse
+from app.models import User
+from app.repository.sync_repo import get_user_changes, stream_user_changes
+
+router = APIRouter(
+    tags=['Sync'],
+)
+
+@router.get("/sync", response_model=SyncResponse, response_class=ORJSONResponse)
+async def sync_changes(
+    since: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return ORJSONResponse(await get_user_changes(current_user, db, since))
+
+@router.get("/sync/stream")
+async def stream_changes(
+    since: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await stream_user_changes(current_user, db, since)
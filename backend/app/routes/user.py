@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schema import UserResponse, Token, UserCreate
 from app.core.database import get_db
 
@@ -11,9 +11,9 @@ router = APIRouter(
 )
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    return register_user(user, db)
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    return await register_user(user, db)
 
 @router.post("/token", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    return login_user(form_data, db)
\ No newline at end of file
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    return await login_user(form_data, db)
\ No newline at end of file
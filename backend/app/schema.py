@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from datetime import date
+from typing import List, Literal, Optional
 
 class UserCreate(BaseModel):
     username: str
@@ -29,7 +30,8 @@ class CategoryResponse(BaseModel):
         from_attributes = True
 
 class ExpenseCreate(BaseModel):
-    amount: float
+    # nan and inf would poison the rollup and month totals
+    amount: float = Field(allow_inf_nan=False)
     description: str
     date: date
     type: str
@@ -45,4 +47,129 @@ class ExpenseResponse(BaseModel):
     category: CategoryResponse
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class CategorySummary(BaseModel):
+    category_id: int
+    name: str
+    income: float
+    expense: float
+
+class PeriodSummary(BaseModel):
+    period: date
+    income: float
+    expense: float
+
+class SummaryResponse(BaseModel):
+    total_income: float
+    total_expense: float
+    balance: float
+    categories: List[CategorySummary]
+    periods: List[PeriodSummary]
+
+class AnalyticsBucket(BaseModel):
+    period: date
+    total: float
+    rolling_average: float
+
+class CategoryTrend(BaseModel):
+    category_id: int
+    name: str
+    month: date
+    total: float
+    previous: float
+    delta: float
+    change_pct: Optional[float] = None
+
+class ForecastPoint(BaseModel):
+    period: date
+    total: float
+
+class AnalyticsResponse(BaseModel):
+    granularity: str
+    window: int
+    buckets: List[AnalyticsBucket]
+    categories: List[CategoryTrend]
+    forecast: List[ForecastPoint]
+    slope: Optional[float] = None
+
+
+class BulkDeleteResponse(BaseModel):
+    deleted: int
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    expense: Optional[ExpenseCreate] = None
+
+    @model_validator(mode="after")
+    def check_fields(self):
+        if self.op != "create" and self.id is None:
+            raise ValueError(f"{self.op} needs the id of an expense")
+        if self.op != "delete" and self.expense is None:
+            raise ValueError(f"{self.op} needs an expense")
+        return self
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+class BatchResult(BaseModel):
+    op: str
+    id: int
+    expense: Optional[ExpenseResponse] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
+
+class BudgetCreate(BaseModel):
+    category_id: int
+    amount: float = Field(gt=0)
+    alert_threshold: float = Field(0.8, gt=0, le=1)
+
+class BudgetUpdate(BaseModel):
+    amount: float = Field(gt=0)
+    alert_threshold: float = Field(0.8, gt=0, le=1)
+
+class BudgetResponse(BaseModel):
+    id: int
+    category_id: int
+    amount: float
+    alert_threshold: float
+
+    class Config:
+        from_attributes = True
+
+class BudgetStatus(BaseModel):
+    budget_id: int
+    category_id: int
+    name: str
+    month: date
+    amount: float
+    spent: float
+    remaining: float
+    status: Literal["ok", "warning", "over"]
+
+class SyncResponse(BaseModel):
+    cursor: str
+    reset: bool = False
+    expenses: List[ExpenseResponse]
+    categories: List[CategoryResponse]
+    deleted_expenses: List[int]
+    deleted_categories: List[int]
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
+
+class ReportJobResponse(BaseModel):
+    id: str
+    period: str
+    status: str
+    error: Optional[str] = None
@@ -0,0 +1,254 @@
+"""Reproducible benchmark of every API router.
+
+Seeds users, categories and expenses through the API itself, then drives
+each endpoint with concurrent clients and reports throughput and
+p50/p95/p99 latency per endpoint, cold PDF render times and peak RSS as
+JSON. By default the app runs in-process against a fresh SQLite file;
+pass --url to benchmark a running server instead, started with
+RATE_LIMIT_ENABLED=false so the per-user rate limits do not skew results.
+
+    python benchmarks/api_benchmark.py --users 5 --expenses 5000 --output before.json
+    python benchmarks/api_benchmark.py --users 5 --expenses 5000 --output after.json
+    python benchmarks/api_benchmark.py --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = max(int(round(len(sorted_values) * p / 100)) - 1, 0)
+    return round(sorted_values[index] * 1000, 2)
+
+@asynccontextmanager
+async def open_client(args):
+    """Yield an HTTP client bound to a running server or to the app in-process."""
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+            yield client
+        return
+
+    if os.path.exists(args.database):
+        os.remove(args.database)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.database}"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    # The benchmark drives one user far past the per-user limits on purpose
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, check=True, capture_output=True)
+    sys.path.insert(0, BACKEND_DIR)
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+            yield client
+
+async def seed(client, args):
+    """Create users with categories and imported expenses, return their credentials."""
+    rng = random.Random(args.seed)
+    users = []
+    run_id = rng.randrange(16**8)
+    for u in range(args.users):
+        name = f"bench_{run_id:08x}_{u}"
+        response = await client.post("/register", json={"username": name, "email": f"{name}@example.com", "password": name})
+        response.raise_for_status()
+        token = (await client.post("/token", data={"username": name, "password": name})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        category_ids = []
+        for c in range(args.categories):
+            category = (await client.post("/categories", json={"name": f"Category {c}"}, headers=headers)).json()
+            category_ids.append(category["id"])
+
+        lines = ["amount,description,date,type,category_id"]
+        for i in range(args.expenses):
+            lines.append(",".join([
+                f"{rng.uniform(1, 500):.2f}",
+                f"Seeded expense {i}",
+                f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                rng.choice(["expense", "expense", "expense", "income"]),
+                str(rng.choice(category_ids)),
+            ]))
+        response = await client.post("/expenses/import", files={"file": ("seed.csv", "\n".join(lines).encode())}, headers=headers)
+        response.raise_for_status()
+        users.append({"name": name, "headers": headers, "category_ids": category_ids})
+    return users
+
+def scenarios(users):
+    """Return (name, coroutine factory) pairs, one per endpoint under test."""
+
+    async def login(client, rng):
+        user = rng.choice(users)
+        return await client.post("/token", data={"username": user["name"], "password": user["name"]})
+
+    async def list_categories(client, rng):
+        return await client.get("/categories", headers=rng.choice(users)["headers"])
+
+    async def create_delete_category(client, rng):
+        headers = rng.choice(users)["headers"]
+        category = await client.post("/categories", json={"name": "Temporary"}, headers=headers)
+        return await client.delete(f"/categories/{category.json()['id']}", headers=headers)
+
+    async def list_expenses(client, rng):
+        return await client.get("/expenses?limit=50", headers=rng.choice(users)["headers"])
+
+    async def summary(client, rng):
+        return await client.get("/expenses/summary?granularity=month", headers=rng.choice(users)["headers"])
+
+    async def export(client, rng):
+        return await client.get("/expenses/export?format=ndjson", headers=rng.choice(users)["headers"])
+
+    async def create_update_delete_expense(client, rng):
+        user = rng.choice(users)
+        body = {"amount": 10, "description": "Benchmark", "date": "2024-06-01", "type": "expense", "category_id": user["category_ids"][0]}
+        created = await client.post("/expenses", json=body, headers=user["headers"])
+        expense_id = created.json()["id"]
+        await client.put(f"/expenses/{expense_id}", json={**body, "amount": 20}, headers=user["headers"])
+        return await client.delete(f"/expenses/{expense_id}", headers=user["headers"])
+
+    async def pdf_report(client, rng):
+        return await client.get("/expenses/report/pdf?start=2024-01-01&end=2024-12-31", headers=rng.choice(users)["headers"])
+
+    return [
+        ("POST /token", login),
+        ("GET /categories", list_categories),
+        ("POST+DELETE /categories", create_delete_category),
+        ("GET /expenses", list_expenses),
+        ("GET /expenses/summary", summary),
+        ("GET /expenses/export", export),
+        ("POST+PUT+DELETE /expenses", create_update_delete_expense),
+        ("GET /expenses/report/pdf", pdf_report),
+    ]
+
+async def run_scenario(client, scenario, args):
+    """Run one scenario with args.concurrency workers and return its statistics."""
+    rng = random.Random(args.seed)
+    latencies = []
+    errors = 0
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, rng)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+async def cold_pdf_renders(client, users):
+    """Time the first (uncached) report render of every seeded user."""
+    timings = []
+    for user in users:
+        started = time.perf_counter()
+        response = await client.get("/expenses/report/pdf?start=2024-01-01&end=2024-12-31", headers=user["headers"])
+        response.raise_for_status()
+        timings.append(round(time.perf_counter() - started, 3))
+    return timings
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def benchmark(args):
+    async with open_client(args) as client:
+        seed_started = time.perf_counter()
+        users = await seed(client, args)
+        seed_seconds = time.perf_counter() - seed_started
+
+        pdf_cold = await cold_pdf_renders(client, users)
+        endpoints = {}
+        for name, scenario in scenarios(users):
+            endpoints[name] = await run_scenario(client, scenario, args)
+            print(f"{name:28} {endpoints[name]}", file=sys.stderr)
+
+    return {
+        "commit": git_commit(),
+        "mode": "url" if args.url else "in-process",
+        "config": {
+            "users": args.users,
+            "categories": args.categories,
+            "expenses_per_user": args.expenses,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "seed_seconds": round(seed_seconds, 2),
+        "pdf_cold_render_seconds": pdf_cold,
+        # ru_maxrss is in KiB on Linux; only meaningful for the in-process mode
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "endpoints": endpoints,
+    }
+
+def compare(before_path, after_path):
+    """Print per-endpoint throughput and p95 changes between two result files."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'endpoint':28} {'rps before':>11} {'rps after':>10} {'p95 before':>11} {'p95 after':>10}")
+    for name, stats in after["endpoints"].items():
+        old = before["endpoints"].get(name, {})
+        print(f"{name:28} {old.get('throughput_rps', '-'):>11} {stats['throughput_rps']:>10} "
+              f"{old.get('p95_ms', '-'):>11} {stats['p95_ms']:>10}")
+    print(f"{'peak RSS MB':28} {before.get('peak_rss_mb'):>11} {after.get('peak_rss_mb'):>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="benchmark a running server instead of the app in-process")
+    parser.add_argument("--database", default="/tmp/expense_benchmark.db", help="SQLite file used in-process")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--expenses", type=int, default=2000, help="expenses seeded per user")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = asyncio.run(benchmark(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
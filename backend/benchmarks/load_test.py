@@ -0,0 +1,62 @@
+"""Concurrent load test against a running API.
+
+Registers a throwaway user, seeds a few expenses and then hammers the
+authenticated read endpoints with N concurrent clients. Run it against the
+same server before and after a change to compare throughput:
+
+    RATE_LIMIT_ENABLED=false uvicorn app.main:app --workers 1 &
+    python benchmarks/load_test.py --url http://localhost:8000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+import uuid
+import httpx
+
+ENDPOINTS = ["/expenses?limit=50", "/categories", "/expenses/summary"]
+
+async def setup(client):
+    """Create a user with a category and some expenses and return auth headers."""
+    name = f"load_{uuid.uuid4().hex[:8]}"
+    await client.post("/register", json={"username": name, "email": f"{name}@example.com", "password": name})
+    token = (await client.post("/token", data={"username": name, "password": name})).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    category = (await client.post("/categories", json={"name": "Load"}, headers=headers)).json()
+    for i in range(100):
+        await client.post("/expenses", headers=headers, json={
+            "amount": i, "description": f"load {i}", "date": "2024-01-01",
+            "type": "expense", "category_id": category["id"]
+        })
+    return headers
+
+async def worker(client, headers, deadline, latencies, errors):
+    i = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(ENDPOINTS[i % len(ENDPOINTS)], headers=headers)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+        i += 1
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        headers = await setup(client)
+        latencies, errors = [], []
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*(worker(client, headers, deadline, latencies, errors) for _ in range(args.concurrency)))
+
+    latencies.sort()
+    print(f"requests:   {len(latencies)}")
+    print(f"errors:     {len(errors)}")
+    print(f"throughput: {len(latencies) / args.duration:.1f} req/s")
+    for p in (50, 95, 99):
+        print(f"p{p}:        {latencies[int(len(latencies) * p / 100) - 1] * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
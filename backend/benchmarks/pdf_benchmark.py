@@ -0,0 +1,69 @@
+"""Render time and peak memory of the PDF report against row count.
+
+Feeds synthetic rows straight into build_pdf, so no database is needed.
+Prints one JSON object per row count:
+
+    python benchmarks/pdf_benchmark.py --rows 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from app.repository.pdf_repo import REPORT_FETCH_ROWS, build_pdf, report_styles
+
+def synthetic_batches(rows):
+    """Return a fetch_batch callable producing rows in REPORT_FETCH_ROWS batches."""
+    start = datetime(2024, 1, 1)
+    produced = 0
+
+    def fetch_batch():
+        nonlocal produced
+        size = min(REPORT_FETCH_ROWS, rows - produced)
+        batch = [
+            (start + timedelta(minutes=produced + i), f"Benchmark expense number {produced + i}", "Groceries", "expense", 12.5)
+            for i in range(size)
+        ]
+        produced += size
+        return batch
+
+    return fetch_batch
+
+def run(rows):
+    summary = {
+        "total_income": 0.0,
+        "total_expense": rows * 12.5,
+        "balance": -rows * 12.5,
+        "categories": [{"category_id": 1, "name": "Groceries", "income": 0.0, "expense": rows * 12.5}],
+        "periods": []
+    }
+    now = datetime.utcnow()
+    tracemalloc.start()
+    started = time.perf_counter()
+    buffer = build_pdf("Benchmark", datetime(2024, 1, 1), now, now, summary, synthetic_batches(rows))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1),
+        "peak_python_mb": round(peak / 2**20, 1),
+        "pdf_mb": round(len(buffer.getvalue()) / 2**20, 2)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    # Import reportlab and build the styles first, like the app's startup warmup does
+    report_styles()
+    for rows in parser.parse_args().rows:
+        print(json.dumps(run(rows)), flush=True)
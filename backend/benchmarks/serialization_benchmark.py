@@ -0,0 +1,118 @@
+"""Serialization cost of the expense and category list endpoints.
+
+Seeds an in-memory SQLite database and times, per row count, the old path
+(ORM objects validated into the response_model through a pre-built
+TypeAdapter, as FastAPI does) against the fast path the list routes use
+now (row tuples turned into dicts and rendered with orjson). Prints one
+JSON object per row count:
+
+    python benchmarks/serialization_benchmark.py --rows 100 1000 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from pydantic import TypeAdapter
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import joinedload
+from app.core.database import Base, SessionLocal, engine
+from app.core.responses import ORJSONResponse
+from app.models import Category, Expense, User
+from app.repository.category_repo import get_user_category
+from app.repository.expense_repo import get_user_expense
+from app.schema import CategoryResponse, ExpenseResponse
+
+EXPENSE_LIST = TypeAdapter(List[ExpenseResponse])
+CATEGORY_LIST = TypeAdapter(List[CategoryResponse])
+
+async def seed(db, user, rows):
+    await db.execute(delete(Expense))
+    categories = (await db.execute(select(Category.id))).scalars().all()
+    start = datetime(2024, 1, 1)
+    await db.execute(insert(Expense), [
+        {
+            "amount": 10 + i % 90,
+            "description": f"Benchmark expense number {i}",
+            "date": start + timedelta(days=i % 365),
+            "type": "expense" if i % 4 else "income",
+            "category_id": categories[i % len(categories)],
+            "user_id": user.id,
+        }
+        for i in range(rows)
+    ])
+    await db.commit()
+
+async def timed(func, repeat):
+    """Return the best of repeat runs of func in milliseconds and its output size."""
+    best, size = None, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+        size = len(body)
+    return round(best, 2), size
+
+async def run(rows_list, repeat):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as db:
+        user = User(username="bench", email="bench@example.com", password="-")
+        db.add(user)
+        await db.flush()
+        db.add_all([Category(name=f"Category {i}", user_id=user.id) for i in range(50)])
+        await db.commit()
+
+        for rows in rows_list:
+            await seed(db, user, rows)
+
+            async def expenses_orm():
+                result = await db.execute(
+                    select(Expense).options(joinedload(Expense.category))
+                    .where(Expense.user_id == user.id)
+                    .order_by(Expense.date.desc(), Expense.id.desc())
+                )
+                body = EXPENSE_LIST.dump_json(EXPENSE_LIST.validate_python(result.scalars().all(), from_attributes=True))
+                db.expunge_all()
+                return body
+
+            async def expenses_fast():
+                expenses, _ = await get_user_expense(user, db)
+                return ORJSONResponse(expenses).body
+
+            async def categories_orm():
+                result = await db.execute(select(Category).where(Category.user_id == user.id))
+                body = CATEGORY_LIST.dump_json(CATEGORY_LIST.validate_python(result.scalars().all(), from_attributes=True))
+                db.expunge_all()
+                return body
+
+            async def categories_fast():
+                return ORJSONResponse(await get_user_category(user, db)).body
+
+            results = {"rows": rows}
+            for name, func in [
+                ("expenses_orm_ms", expenses_orm),
+                ("expenses_fast_ms", expenses_fast),
+                ("categories_orm_ms", categories_orm),
+                ("categories_fast_ms", categories_fast),
+            ]:
+                results[name], results[name.replace("_ms", "_bytes")] = await timed(func, repeat)
+            print(json.dumps(results))
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
@@ -0,0 +1,68 @@
+"""Worker cold start: time to import the app and to finish its startup.
+
+Each run boots the app in a fresh interpreter against a migrated SQLite
+file, the way a new uvicorn worker would, and reports how long
+`import app.main` and the lifespan startup took and which heavy modules
+were loaded by then. Prints one JSON object with the median of every
+measurement:
+
+    python benchmarks/startup_benchmark.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["reportlab", "numpy", "orjson", "argon2", "jose"]
+
+WORKER = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+loaded = [m for m in %(heavy)r if m in sys.modules]
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(boot())
+print(json.dumps({
+    "import_seconds": imported - started,
+    "startup_seconds": ready - imported,
+    "total_seconds": ready - started,
+    "loaded_at_import": loaded,
+}))
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--database", default="/tmp/expense_startup.db")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{args.database}")
+    env.setdefault("SECRET_KEY", "benchmark")
+    env.setdefault("ALGORITHM", "HS256")
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", WORKER % {"heavy": HEAVY_MODULES}], cwd=BACKEND_DIR, env=env, text=True
+        )
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps({
+        "runs": args.runs,
+        "import_ms": round(statistics.median(r["import_seconds"] for r in runs) * 1000, 1),
+        "startup_ms": round(statistics.median(r["startup_seconds"] for r in runs) * 1000, 1),
+        "total_ms": round(statistics.median(r["total_seconds"] for r in runs) * 1000, 1),
+        "loaded_at_import": runs[-1]["loaded_at_import"],
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import asyncio
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+from app.core.database import Base, async_database_url
+import app.models  # noqa: F401, registers the tables on Base.metadata
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Full-text search objects are written by hand in the migrations, keep
+# autogenerate from proposing to drop them
+SEARCH_OBJECTS = ("expenses_fts", "ix_expenses_description_fts")
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (reflected and compare_to is None and (name or "").startswith(SEARCH_OBJECTS))
+
+def run_migrations_offline():
+    """Emit the migration SQL for DATABASE_URL without connecting."""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite cannot ALTER most constraints, batch mode recreates the table instead
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_migrations_online():
+    """Apply the migrations over a single connection of the app's async driver."""
+    engine = create_async_engine(async_database_url(settings.DATABASE_URL), poolclass=pool.NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,60 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+The users, categories and expenses tables exactly as the app's original
+Base.metadata.create_all() created them. Databases that already have them
+are adopted as they are, so `alembic upgrade head` works on them too.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table('users'):
+        return
+
+    op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=True),
+        sa.Column('email', sa.String(length=50), nullable=True),
+        sa.Column('password', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table('categories',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_categories_id', 'categories', ['id'])
+
+    op.create_table('expenses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=True),
+        sa.Column('description', sa.String(length=200), nullable=True),
+        sa.Column('date', sa.DateTime(), nullable=True),
+        sa.Column('type', sa.String(length=20), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_expenses_id', 'expenses', ['id'])
+
+def downgrade():
+    op.drop_table('expenses')
+    op.drop_table('categories')
+    op.drop_table('users')
@@ -0,0 +1,58 @@
+"""rollups and data versions
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Seed the day rollups from the expenses that already exist
+BACKFILL_ROLLUPS = (
+    "INSERT INTO expense_rollups (user_id, category_id, type, day, total, count) "
+    "SELECT user_id, category_id, type, {day}, sum(amount), count(id) FROM expenses "
+    "WHERE user_id IS NOT NULL AND category_id IS NOT NULL AND type IS NOT NULL "
+    "AND date IS NOT NULL AND amount IS NOT NULL "
+    "GROUP BY user_id, category_id, type, {day}"
+)
+DAY_EXPRESSIONS = {
+    'sqlite': "date(date)",
+    'postgresql': "CAST(date AS date)",
+}
+
+def upgrade():
+    op.create_table('expense_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=20), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'day', 'category_id', 'type', name='uq_expense_rollups_bucket')
+    )
+    op.create_index('ix_expense_rollups_id', 'expense_rollups', ['id'])
+
+    # Users without a row are at version 0, no backfill needed
+    op.create_table('data_versions',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    day = DAY_EXPRESSIONS.get(op.get_bind().dialect.name)
+    if day:
+        op.execute(BACKFILL_ROLLUPS.format(day=day))
+
+def downgrade():
+    op.drop_table('data_versions')
+    op.drop_table('expense_rollups')
@@ -0,0 +1,39 @@
+"""cascades and listing index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# The original foreign keys are unnamed. This convention names them the way
+# PostgreSQL already does, so SQLite's batch mode can find them by name too
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+FOREIGN_KEYS = [
+    ('categories', 'user_id', 'users'),
+    ('expenses', 'user_id', 'users'),
+    ('expenses', 'category_id', 'categories'),
+]
+
+def _replace_foreign_keys(ondelete):
+    for table in ('categories', 'expenses'):
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            for fk_table, column, referred in FOREIGN_KEYS:
+                if fk_table != table:
+                    continue
+                name = f'{table}_{column}_fkey'
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+def upgrade():
+    _replace_foreign_keys('CASCADE')
+    op.create_index('ix_expenses_user_date_id', 'expenses', ['user_id', 'date', 'id'])
+
+def downgrade():
+    op.drop_index('ix_expenses_user_date_id', table_name='expenses')
+    _replace_foreign_keys(None)
@@ -0,0 +1,53 @@
+"""expense search
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# SQLite keeps descriptions in an external content FTS5 table that triggers
+# keep in step with expenses; 'rebuild' indexes the rows that already exist.
+# PostgreSQL indexes a tsvector expression, which covers existing rows as it
+# is built
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE expenses_fts USING fts5("
+    "description, content='expenses', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER expenses_fts_ai AFTER INSERT ON expenses BEGIN "
+    "INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER expenses_fts_ad AFTER DELETE ON expenses BEGIN "
+    "INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER expenses_fts_au AFTER UPDATE OF description ON expenses BEGIN "
+    "INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description); END",
+    "INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')",
+]
+POSTGRES_SEARCH_DDL = [
+    "CREATE INDEX ix_expenses_description_fts ON expenses "
+    "USING gin (to_tsvector('simple'::regconfig, coalesce(description, '')))",
+]
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_SEARCH_DDL:
+            op.execute(statement)
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # Dropping the table does not drop the triggers that write to it
+        for trigger in ('expenses_fts_ai', 'expenses_fts_ad', 'expenses_fts_au'):
+            op.execute(f"DROP TRIGGER {trigger}")
+        op.execute("DROP TABLE expenses_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX ix_expenses_description_fts")
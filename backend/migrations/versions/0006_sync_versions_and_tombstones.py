@@ -0,0 +1,43 @@
+"""sync versions and tombstones
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+Existing rows start at version 0, which every sync cursor is past; clients
+pick them up from the regular list endpoints.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Plain ADD COLUMN rather than batch mode, so SQLite does not rebuild
+    # expenses and drop its full-text search triggers
+    for table in ('categories', 'expenses'):
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.create_index(f'ix_{table}_user_version', table, ['user_id', 'version'])
+
+    op.create_table('sync_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sync_tombstones_user_version', 'sync_tombstones', ['user_id', 'version'])
+
+def downgrade():
+    op.drop_table('sync_tombstones')
+    for table in ('expenses', 'categories'):
+        op.drop_index(f'ix_{table}_user_version', table_name=table)
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
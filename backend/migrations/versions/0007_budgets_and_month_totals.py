@@ -0,0 +1,59 @@
+"""budgets and month totals
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# Seed the running month totals from the expenses that already exist
+BACKFILL_MONTH_TOTALS = (
+    "INSERT INTO category_month_totals (user_id, category_id, month, total, count) "
+    "SELECT user_id, category_id, {month}, sum(amount), count(id) FROM expenses "
+    "WHERE type = 'expense' AND user_id IS NOT NULL AND category_id IS NOT NULL "
+    "AND date IS NOT NULL AND amount IS NOT NULL "
+    "GROUP BY user_id, category_id, {month}"
+)
+MONTH_EXPRESSIONS = {
+    'sqlite': "date(date, 'start of month')",
+    'postgresql': "CAST(date_trunc('month', date) AS date)",
+}
+
+def upgrade():
+    op.create_table('category_month_totals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'category_id', 'month', name='uq_category_month_totals_bucket')
+    )
+    op.create_table('budgets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('alert_threshold', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'category_id', name='uq_budgets_user_category')
+    )
+
+    month = MONTH_EXPRESSIONS.get(op.get_bind().dialect.name)
+    if month:
+        op.execute(BACKFILL_MONTH_TOTALS.format(month=month))
+
+def downgrade():
+    op.drop_table('budgets')
+    op.drop_table('category_month_totals')
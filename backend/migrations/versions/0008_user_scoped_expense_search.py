@@ -0,0 +1,52 @@
+"""user scoped expense search
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# The SQLite FTS5 table also indexes user_id, so a search intersects the
+# terms with the user's own rows inside the index instead of matching and
+# scoring every user's rows. PostgreSQL is unchanged
+TRIGGERS = ('expenses_fts_ai', 'expenses_fts_ad', 'expenses_fts_au')
+
+def search_ddl(columns):
+    values = ", ".join(f"new.{name}" for name in columns)
+    old_values = ", ".join(f"old.{name}" for name in columns)
+    names = ", ".join(columns)
+    return [
+        "CREATE VIRTUAL TABLE expenses_fts USING fts5("
+        f"{names}, content='expenses', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER expenses_fts_ai AFTER INSERT ON expenses BEGIN "
+        f"INSERT INTO expenses_fts(rowid, {names}) VALUES (new.id, {values}); END",
+        "CREATE TRIGGER expenses_fts_ad AFTER DELETE ON expenses BEGIN "
+        f"INSERT INTO expenses_fts(expenses_fts, rowid, {names}) VALUES ('delete', old.id, {old_values}); END",
+        "CREATE TRIGGER expenses_fts_au AFTER UPDATE OF description ON expenses BEGIN "
+        f"INSERT INTO expenses_fts(expenses_fts, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO expenses_fts(rowid, {names}) VALUES (new.id, {values}); END",
+        "INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')",
+    ]
+
+def drop_search():
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER {trigger}")
+    op.execute("DROP TABLE expenses_fts")
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        drop_search()
+        for statement in search_ddl(('description', 'user_id')):
+            op.execute(statement)
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        drop_search()
+        for statement in search_ddl(('description',)):
+            op.execute(statement)
@@ -0,0 +1,68 @@
+"""Shared fixtures: the app on fresh, migrated SQLite files, driven over ASGI.
+
+The settings and engines are created when app.core is first imported, so
+the environment is set up here, before any test module imports the app.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import httpx
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_DIR = tempfile.TemporaryDirectory(prefix="expense-tracker-tests-")
+PRIMARY_DATABASE = os.path.join(DATABASE_DIR.name, "primary.db")
+REPLICA_DATABASE = os.path.join(DATABASE_DIR.name, "replica.db")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{PRIMARY_DATABASE}"
+# A second file stands in for the read replica; it only gets the users' data
+# when a test copies the primary over it
+os.environ["READ_DATABASE_URL"] = f"sqlite:///{REPLICA_DATABASE}"
+# Writers stay pinned to the primary for the whole run unless a test unpins them
+os.environ["READ_YOUR_WRITES_SECONDS"] = "3600"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["WARMUP_ON_STARTUP"] = "false"
+# Cheap password hashes, registering a user per test should not dominate the run
+os.environ["ARGON2_TIME_COST"] = "1"
+os.environ["ARGON2_MEMORY_COST"] = "1024"
+os.environ["ARGON2_PARALLELISM"] = "1"
+
+def migrate(url):
+    """Bring the database at url to the head revision."""
+    env = {**os.environ, "DATABASE_URL": url}
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+def app():
+    migrate(os.environ["DATABASE_URL"])
+    migrate(os.environ["READ_DATABASE_URL"])
+    from app.main import app
+    return app
+
+@pytest.fixture(scope="session")
+async def client(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+@pytest.fixture
+async def user(client, request):
+    """Register a user with two categories and a few expenses in each, return their auth headers."""
+    name = request.node.name.replace("[", "_").replace("]", "")
+    response = await client.post("/register", json={"username": name, "email": f"{name}@example.com", "password": name})
+    response.raise_for_status()
+    token = (await client.post("/token", data={"username": name, "password": name})).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for c in range(2):
+        category = (await client.post("/categories", json={"name": f"Category {c}"}, headers=headers)).json()
+        for i in range(3):
+            body = {"amount": 10 + i, "description": f"Expense {i}", "date": f"2026-10-0{i + 1}", "type": "expense", "category_id": category["id"]}
+            (await client.post("/expenses", json=body, headers=headers)).raise_for_status()
+    return headers
@@ -0,0 +1,22 @@
+"""The in-process TTL cache bounded by the total size of its values."""
+from app.core.cache import TTLCache
+
+def test_weighed_cache_evicts_by_total_size():
+    cache = TTLCache(10, 60, weigh=len)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")
+    # b was the least recently used, a and c fit within 10 bytes
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    assert cache.weight == 8
+
+def test_weighed_cache_replaces_and_skips_oversized_values():
+    cache = TTLCache(10, 60, weigh=len)
+    cache.set("a", b"1234")
+    cache.set("a", b"12")
+    assert cache.weight == 2
+    cache.set("b", b"12345678901")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12"
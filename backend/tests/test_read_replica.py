@@ -0,0 +1,53 @@
+"""Routing of reads between the primary and the read replica."""
+import sqlite3
+import time
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.core import database
+from app.core.database import count_statements
+from conftest import PRIMARY_DATABASE, REPLICA_DATABASE
+
+pytestmark = pytest.mark.anyio
+
+def replicate():
+    """Bring the replica up to date with the primary."""
+    with sqlite3.connect(PRIMARY_DATABASE) as primary, sqlite3.connect(REPLICA_DATABASE) as replica:
+        primary.backup(replica)
+
+async def test_writer_is_pinned_to_primary(client, user):
+    response = await client.get("/expenses", headers=user)
+    assert len(response.json()) == 6
+
+    # Once unpinned, the replica that has none of the user's data serves the read
+    database.primary_pins.clear()
+    with count_statements(database.read_engine.sync_engine) as statements:
+        response = await client.get("/expenses", headers=user)
+    assert response.json() == []
+    assert statements
+
+async def test_min_data_version_waits_for_replica(client, user):
+    response = await client.post("/categories", json={"name": "Travel"}, headers=user)
+    version = response.headers["X-Data-Version"]
+    # As if the next read reached another worker, which holds no pin
+    database.primary_pins.clear()
+    headers = {**user, "X-Min-Data-Version": version}
+
+    response = await client.get("/categories", headers=headers)
+    assert len(response.json()) == 3
+
+    replicate()
+    with count_statements(database.read_engine.sync_engine) as statements:
+        response = await client.get("/categories", headers=headers)
+    assert len(response.json()) == 3
+    assert statements
+
+async def test_unreachable_replica_falls_back_to_primary(client, user, monkeypatch, tmp_path):
+    unreachable = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db")
+    monkeypatch.setattr(database, "ReadSessionLocal", async_sessionmaker(bind=unreachable))
+    monkeypatch.setattr(database, "replica_down_until", 0.0)
+    database.primary_pins.clear()
+
+    response = await client.get("/expenses", headers=user)
+    assert len(response.json()) == 6
+    assert database.replica_down_until > time.monotonic()
+    await unreachable.dispose()
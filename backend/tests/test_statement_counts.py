@@ -0,0 +1,31 @@
+"""Statements issued per request, so N+1 regressions fail the build.
+
+Each user owns two categories, so a lazy load per category would add two.
+"""
+import pytest
+from app.core.database import count_statements
+
+pytestmark = pytest.mark.anyio
+
+async def test_list_expenses(client, user):
+    with count_statements() as statements:
+        response = await client.get("/expenses", headers=user)
+    assert response.status_code == 200
+    assert len(response.json()) == 6
+    # Data version for the ETag, then the rows joined with their category names
+    assert len(statements) == 2
+
+async def test_list_categories(client, user):
+    with count_statements() as statements:
+        response = await client.get("/categories", headers=user)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert len(statements) == 2
+
+async def test_pdf_report(client, user):
+    with count_statements() as statements:
+        response = await client.get("/expenses/report/pdf?start=2026-10-01&end=2026-10-31", headers=user)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    # Data version, the two rollup summaries, then the streamed rows
+    assert len(statements) == 4
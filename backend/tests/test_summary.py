@@ -0,0 +1,12 @@
+"""The summary read from the rollups."""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def test_summary_skips_emptied_buckets(client, user):
+    response = await client.delete("/expenses", params={"start": "2026-10-02"}, headers=user)
+    assert response.json() == {"deleted": 4}
+
+    summary = (await client.get("/expenses/summary", params={"granularity": "day"}, headers=user)).json()
+    assert summary["periods"] == [{"period": "2026-10-01", "income": 0.0, "expense": 20.0}]
+    assert [category["expense"] for category in summary["categories"]] == [10.0, 10.0]
@@ -4,6 +4,7 @@ import { useState, useEffect } from 'react';
 import Login from './pages/Login';
 import Register from './pages/Register';
 import Dashboard from './pages/Dashboard';
+import { forgetDataVersion } from './dataVersion';
 
 export default function App() {
   const [token, setToken] = useState(null);
@@ -28,6 +29,7 @@ export default function App() {
     setToken(null);
     setUser(null);
     localStorage.removeItem('token');
+    forgetDataVersion();
   };
 
   return (
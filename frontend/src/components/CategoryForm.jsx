@@ -1,6 +1,7 @@
 import { useState } from 'react';
 import { X } from 'lucide-react';
 import toast from 'react-hot-toast';
+import { rememberDataVersion } from '../dataVersion';
 
 const API_BASE = import.meta.env.VITE_API_URL;
 
@@ -21,6 +22,7 @@ export default function CategoryForm({ isOpen, token, onClose, onSuccess }) {
       });
 
       if (response.ok) {
+        rememberDataVersion(response);
         onSuccess();
         setCategoryName('');
         toast.success('Category added!', { id: loadingToast });
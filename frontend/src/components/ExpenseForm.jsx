@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { Plus, X } from 'lucide-react';
 import toast from 'react-hot-toast';
+import { rememberDataVersion } from '../dataVersion';
 
 const API_BASE = import.meta.env.VITE_API_URL;
 
@@ -57,6 +58,7 @@ export default function ExpenseForm({ isOpen, editingExpense, categories, token,
       });
 
       if (response.ok) {
+        rememberDataVersion(response);
         onSuccess();
         toast.success(editingExpense ? 'Transaction updated!' : 'Transaction added!', { id: loadingToast });
       } else {
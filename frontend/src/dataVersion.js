@@ -0,0 +1,18 @@
+// Writes answer with X-Data-Version; sending the last one back as
+// X-Min-Data-Version keeps reads served by a lagging read replica from
+// missing them
+const STORAGE_KEY = 'dataVersion';
+
+export function rememberDataVersion(response) {
+  const version = response.headers.get('X-Data-Version');
+  if (version) localStorage.setItem(STORAGE_KEY, version);
+}
+
+export function dataVersionHeaders() {
+  const version = localStorage.getItem(STORAGE_KEY);
+  return version ? { 'X-Min-Data-Version': version } : {};
+}
+
+export function forgetDataVersion() {
+  localStorage.removeItem(STORAGE_KEY);
+}
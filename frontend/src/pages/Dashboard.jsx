@@ -6,12 +6,14 @@ import ConfirmDialog from '../components/ConfirmDialog';
 import ExpenseForm from '../components/ExpenseForm';
 import CategoryForm from '../components/CategoryForm';
 import PdfOptions from '../components/PdfOptions';
+import { dataVersionHeaders, rememberDataVersion } from '../dataVersion';
 
 const API_BASE = import.meta.env.VITE_API_URL;
 
 export default function Dashboard({ token, user, onLogout }) {
   const [expenses, setExpenses] = useState([]);
   const [categories, setCategories] = useState([]);
+  const [summary, setSummary] = useState(null);
   const [showExpenseForm, setShowExpenseForm] = useState(false);
   const [showCategoryForm, setShowCategoryForm] = useState(false);
   const [showPdfOptions, setShowPdfOptions] = useState(false);
@@ -40,20 +42,25 @@ export default function Dashboard({ token, user, onLogout }) {
 
   const fetchData = async () => {
     try {
-      const [expensesRes, categoriesRes] = await Promise.all([
-        fetch(`${API_BASE}/expenses`, {
-          headers: { 'Authorization': `Bearer ${token}` }
+      const [expensesRes, categoriesRes, summaryRes] = await Promise.all([
+        fetch(`${API_BASE}/expenses?limit=10`, {
+          headers: { 'Authorization': `Bearer ${token}`, ...dataVersionHeaders() }
         }),
         fetch(`${API_BASE}/categories`, {
-          headers: { 'Authorization': `Bearer ${token}` }
+          headers: { 'Authorization': `Bearer ${token}`, ...dataVersionHeaders() }
+        }),
+        fetch(`${API_BASE}/expenses/summary`, {
+          headers: { 'Authorization': `Bearer ${token}`, ...dataVersionHeaders() }
         })
       ]);
 
-      if (expensesRes.ok && categoriesRes.ok) {
+      if (expensesRes.ok && categoriesRes.ok && summaryRes.ok) {
         const expensesData = await expensesRes.json();
         const categoriesData = await categoriesRes.json();
+        const summaryData = await summaryRes.json();
         setExpenses(expensesData);
         setCategories(categoriesData);
+        setSummary(summaryData);
       } else {
         toast.error('Failed to fetch data');
       }
@@ -78,7 +85,8 @@ export default function Dashboard({ token, user, onLogout }) {
       });
 
       if (response.ok) {
-        setExpenses(prevExpenses => prevExpenses.filter(exp => exp.id !== id));
+        rememberDataVersion(response);
+        fetchData();
         toast.success('Transaction deleted!', { id: loadingToast });
       } else {
         toast.error('Failed to delete transaction', { id: loadingToast });
@@ -106,7 +114,7 @@ export default function Dashboard({ token, user, onLogout }) {
     const loadingToast = toast.loading('Generating PDF...');
     try {
       const response = await fetch(`${API_BASE}/expenses/report/pdf?period=${period}`, {
-        headers: { 'Authorization': `Bearer ${token}` }
+        headers: { 'Authorization': `Bearer ${token}`, ...dataVersionHeaders() }
       });
       
       if (response.ok) {
@@ -128,13 +136,13 @@ export default function Dashboard({ token, user, onLogout }) {
     }
   };
 
-  const totalIncome = expenses.filter(e => e.type === 'income').reduce((sum, e) => sum + e.amount, 0);
-  const totalExpense = expenses.filter(e => e.type === 'expense').reduce((sum, e) => sum + e.amount, 0);
-  const balance = totalIncome - totalExpense;
+  const totalIncome = summary?.total_income ?? 0;
+  const totalExpense = summary?.total_expense ?? 0;
+  const balance = summary?.balance ?? 0;
 
-  const categoryData = categories.map(cat => ({
+  const categoryData = (summary?.categories ?? []).map(cat => ({
     name: cat.name,
-    value: expenses.filter(e => e.category_id === cat.id && e.type === 'expense').reduce((sum, e) => sum + e.amount, 0)
+    value: cat.expense
   })).filter(d => d.value > 0);
 
   const COLORS = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444', '#8b5cf6', '#ec4899', '#14b8a6', '#f97316'];